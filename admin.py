@@ -0,0 +1,20 @@
+# admin.py - Access check shared by the admin endpoints of both bots
+import hmac
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+LOCAL_ADDRESSES = {"127.0.0.1", "::1"}
+
+
+def is_admin_request(req):
+    """Allow admin calls with a matching X-Admin-Token header.
+
+    Without ADMIN_TOKEN configured, admin endpoints only answer requests from localhost.
+    """
+    if ADMIN_TOKEN:
+        token = req.headers.get("X-Admin-Token", "")
+        return hmac.compare_digest(token, ADMIN_TOKEN)
+    return req.remote_addr in LOCAL_ADDRESSES
@@ -0,0 +1,211 @@
+# admission.py - Per-client rate limiting and admission control for LLM calls
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Configuration
+RATE_LIMIT_PER_MINUTE = float(os.getenv("RATE_LIMIT_PER_MINUTE", "30"))  # Sustained requests per client
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "10"))  # Bucket size
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "10000"))  # Buckets kept in memory
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))  # Global cap on in-flight LLM calls
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "16"))  # Waiting callers before shedding
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "5"))  # Seconds a caller may wait for a slot
+LLM_BATCH_MAX_CONCURRENCY = int(os.getenv("LLM_BATCH_MAX_CONCURRENCY", "2"))  # Share of the cap batch work may use
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def try_acquire(self, now=None):
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def retry_after(self):
+        """Seconds until the next token is available."""
+        return max((1 - self.tokens) / self.rate, 0.0) if self.rate else float("inf")
+
+
+class RateLimiter:
+    """One token bucket per client; least recently seen clients are evicted past `max_clients`."""
+
+    def __init__(self, per_minute=RATE_LIMIT_PER_MINUTE, burst=RATE_LIMIT_BURST,
+                 max_clients=RATE_LIMIT_MAX_CLIENTS):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.max_clients = max_clients
+        self.enabled = per_minute > 0
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = 0
+
+    def check(self, client_id):
+        """Return (allowed, retry_after_seconds) and consume a token if allowed."""
+        if not self.enabled:
+            return True, 0.0
+        with self._lock:
+            bucket = self._buckets.get(client_id)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.burst)
+                self._buckets[client_id] = bucket
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client_id)
+
+            if bucket.try_acquire():
+                self.allowed += 1
+                return True, 0.0
+            self.rejected += 1
+            return False, bucket.retry_after()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "per_minute": self.rate * 60,
+                "burst": self.burst,
+                "clients_tracked": len(self._buckets),
+                "allowed": self.allowed,
+                "rejected": self.rejected
+            }
+
+
+class AdmissionController:
+    """Caps concurrent LLM calls and sheds load once too many callers are waiting.
+
+    A caller is shed immediately when `max_queue` callers are already waiting, or
+    after waiting `queue_timeout` seconds for a slot. Shed callers should answer
+    from the cache or local index instead.
+
+    Blocking (batch) callers are never shed and are not counted in the queue.
+    They first take one of `max_batch_concurrency` batch slots, so at least
+    `max_concurrency - max_batch_concurrency` slots stay free for interactive calls.
+    At least `interactive_reserve` slots are always kept back; offline batch
+    runs, which have no interactive callers, pass 0.
+    """
+
+    def __init__(self, max_concurrency=LLM_MAX_CONCURRENCY, max_queue=LLM_MAX_QUEUE,
+                 queue_timeout=LLM_QUEUE_TIMEOUT, max_batch_concurrency=LLM_BATCH_MAX_CONCURRENCY,
+                 interactive_reserve=1):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_batch_concurrency = max(1, min(max_batch_concurrency, max_concurrency - interactive_reserve))
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._batch_slots = threading.BoundedSemaphore(self.max_batch_concurrency)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.batch_in_flight = 0
+        self.batch_waiting = 0
+        self.waiting = 0
+        self.peak_waiting = 0
+        self.admitted = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+        self.total_wait_ms = 0.0
+
+    def acquire(self, block=False):
+        """Take an LLM slot; returns False if the caller was shed.
+
+        With block=True (offline batch work) the caller waits as long as needed
+        and is never shed, but only within the batch share of the cap.
+        """
+        if block:
+            return self._acquire_batch()
+        with self._lock:
+            if self.waiting >= self.max_queue:
+                self.shed_queue_full += 1
+                return False
+            self.waiting += 1
+            self.peak_waiting = max(self.peak_waiting, self.waiting)
+
+        start = time.perf_counter()
+        acquired = self._slots.acquire(timeout=self.queue_timeout)
+        waited_ms = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            self.waiting -= 1
+            if not acquired:
+                self.shed_timeout += 1
+                return False
+            self.in_flight += 1
+            self.admitted += 1
+            self.total_wait_ms += waited_ms
+        return True
+
+    def _acquire_batch(self):
+        with self._lock:
+            self.batch_waiting += 1
+        start = time.perf_counter()
+        self._batch_slots.acquire()
+        self._slots.acquire()
+        waited_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.batch_waiting -= 1
+            self.in_flight += 1
+            self.batch_in_flight += 1
+            self.admitted += 1
+            self.total_wait_ms += waited_ms
+        return True
+
+    def release(self, block=False):
+        with self._lock:
+            self.in_flight -= 1
+            if block:
+                self.batch_in_flight -= 1
+        self._slots.release()
+        if block:
+            self._batch_slots.release()
+
+    @contextmanager
+    def slot(self, block=False):
+        """Context manager yielding True if a slot was taken, False if shed."""
+        admitted = self.acquire(block)
+        try:
+            yield admitted
+        finally:
+            if admitted:
+                self.release(block)
+
+    def stats(self):
+        with self._lock:
+            shed = self.shed_queue_full + self.shed_timeout
+            total = self.admitted + shed
+            return {
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "queue_timeout_s": self.queue_timeout,
+                "max_batch_concurrency": self.max_batch_concurrency,
+                "in_flight": self.in_flight,
+                "batch_in_flight": self.batch_in_flight,
+                "waiting": self.waiting,
+                "batch_waiting": self.batch_waiting,
+                "peak_waiting": self.peak_waiting,
+                "admitted": self.admitted,
+                "shed_queue_full": self.shed_queue_full,
+                "shed_timeout": self.shed_timeout,
+                "shed_rate": round(shed / total, 4) if total else 0.0,
+                "avg_wait_ms": round(self.total_wait_ms / self.admitted, 2) if self.admitted else 0.0
+            }
+
+
+def client_id(req):
+    """Rate-limit key for a Flask request: the client IP address."""
+    return req.remote_addr or "unknown"
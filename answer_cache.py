@@ -0,0 +1,74 @@
+# answer_cache.py - Small thread-safe LRU cache of generated answers
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1024"))  # 0 disables caching
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))  # Seconds
+
+
+def normalize_question(question):
+    """Cache key: lowercase words only, so 'Who founded FOSS-CIT?' == 'who founded foss cit'."""
+    return " ".join(re.findall(r'\w+', question.lower()))
+
+
+class AnswerCache:
+    """LRU + TTL cache mapping normalized questions to answer payloads.
+
+    Entries may carry the knowledge base version they were built from; a lookup
+    for another version is a miss, so an answer finished after a reload is never
+    served from the new data.
+    """
+
+    def __init__(self, max_size=ANSWER_CACHE_SIZE, ttl=ANSWER_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, question, version=None):
+        if self.max_size <= 0:
+            return None
+        key = normalize_question(question)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (self.ttl and time.time() - entry[0] > self.ttl) or entry[2] != version:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, question, value, version=None):
+        if self.max_size <= 0:
+            return
+        key = normalize_question(question)
+        with self._lock:
+            self._entries[key] = (time.time(), value, version)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
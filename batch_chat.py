@@ -0,0 +1,73 @@
+# batch_chat.py - Offline batch question answering for the FOSS-CIT bot
+#
+# Usage:
+#   python batch_chat.py questions.jsonl -o answers.jsonl --concurrency 16
+#   type questions.jsonl | python batch_chat.py -
+#   python batch_chat.py questions.jsonl --namespace other-club
+#
+# Each input line is either a JSON object ({"id": ..., "message": ...}) or a bare
+# JSON string. Answers are written as JSONL in completion order, each carrying
+# its input "id"/"index" and per-stage timings.
+import argparse
+import contextlib
+import json
+import sys
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of questions with the FOSS-CIT bot.")
+    parser.add_argument("input", help="JSONL questions file, or '-' for stdin")
+    parser.add_argument("-o", "--output", help="Write JSONL answers here (default: stdout)")
+    parser.add_argument("-c", "--concurrency", type=int, default=None,
+                        help="Parallel LLM calls (default: BATCH_CONCURRENCY)")
+    parser.add_argument("-n", "--namespace", default=None,
+                        help="Community namespace to answer for (default: DEFAULT_NAMESPACE)")
+    args = parser.parse_args()
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+
+    # The bot logs progress with print(); keep stdout clean for the JSONL answers
+    with contextlib.redirect_stdout(sys.stderr):
+        import openrouter_pinecone_bot as bot
+
+        if args.input == "-":
+            lines = sys.stdin.read().splitlines()
+        else:
+            with open(args.input, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+
+        try:
+            questions = bot.parse_jsonl_questions(lines)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+
+        try:
+            tenant = bot.namespaces.get(args.namespace)
+        except KeyError:
+            print(f"❌ Unknown namespace: {args.namespace}")
+            sys.exit(1)
+
+        concurrency = bot.clamp_batch_concurrency(args.concurrency or bot.BATCH_CONCURRENCY)
+        print(f"📦 Answering {len(questions)} questions for '{tenant.name}' (concurrency {concurrency})...")
+
+        start = time.perf_counter()
+        failed = 0
+        # No chat traffic to protect here, so every LLM slot goes to the batch
+        admission = bot.offline_admission(concurrency)
+        for result in bot.answer_batch(questions, concurrency=concurrency, tenant=tenant, admission=admission):
+            failed += 'error' in result
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+            output.flush()
+        elapsed = time.perf_counter() - start
+
+        print(f"✅ Answered {len(questions) - failed}/{len(questions)} questions in {elapsed:.1f}s "
+              f"({len(questions) / elapsed if elapsed else 0:.2f} questions/s)")
+
+    if output is not sys.stdout:
+        output.close()
+
+
+if __name__ == "__main__":
+    main()
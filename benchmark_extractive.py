@@ -0,0 +1,107 @@
+# benchmark_extractive.py - LLM-call avoidance and latency of extractive answers in bot.py
+#
+# Usage:
+#   python benchmark_extractive.py                         # built-in sample questions, dry run
+#   python benchmark_extractive.py questions.jsonl         # one {"message": ...} or "..." per line
+#   python benchmark_extractive.py questions.jsonl --call-llm
+#
+# Each question goes through get_ultra_brief_answer() twice: once as the current flow
+# (extractive answers off) and once with extractive answers on. Without --call-llm,
+# LLM calls are not made. Each one is charged --llm-ms instead, so both flows can be
+# compared offline.
+import argparse
+import json
+import os
+import time
+
+SAMPLE_QUESTIONS = [
+    "Who founded FOSS-CIT?",
+    "What is the vision of FOSS-CIT?",
+    "What does the joint secretary do?",
+    "What happens if a participant violates the rules of a hackathon?",
+    "How are mock interviews conducted?",
+    "Can I take leave during a club event?",
+    "How are budgets approved for events?",
+    "What are talk shows?",
+    "How do I prepare for a job interview?",
+    "What platforms do you post updates on?",
+    "Who can become a resource person?",
+    "What is the code of conduct?",
+]
+
+
+def load_questions(path):
+    if not path:
+        return SAMPLE_QUESTIONS
+    questions = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                item = json.loads(line)
+                questions.append(item if isinstance(item, str) else item.get("message") or item.get("question"))
+    return [q for q in questions if q]
+
+
+def run_flow(bot, questions, extractive, call_llm, llm_ms):
+    bot.EXTRACTIVE_ANSWERS = extractive
+    latencies, paths = [], []
+    for question in questions:
+        start = time.perf_counter()
+        _, path = bot.get_ultra_brief_answer(question)
+        elapsed = (time.perf_counter() - start) * 1000
+        if path == "llm" and not call_llm:
+            elapsed += llm_ms
+        latencies.append(elapsed)
+        paths.append(path)
+    return latencies, paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare bot.py with and without extractive answers.")
+    parser.add_argument("questions", nargs="?", help="JSONL questions (default: built-in sample)")
+    parser.add_argument("--knowledge-base", default=None,
+                        help="Knowledge base to load (default: bot.py's own, BRIEF_KNOWLEDGE_BASE_PATH)")
+    parser.add_argument("--call-llm", action="store_true", help="Make real LLM calls instead of charging --llm-ms")
+    parser.add_argument("--llm-ms", type=float, default=1200.0, help="Assumed LLM latency for dry runs")
+    args = parser.parse_args()
+
+    if args.knowledge_base:
+        os.environ["BRIEF_KNOWLEDGE_BASE_PATH"] = args.knowledge_base
+    if not args.call_llm:
+        # The client is never used in a dry run, but it refuses to build without a key
+        os.environ.setdefault("OPENAI_API_KEY", "dry-run")
+
+    import bot
+    from metrics import percentile
+
+    if not args.call_llm:
+        bot.generate_ai_brief_answer = lambda question, context: "(LLM answer not requested)"
+
+    questions = load_questions(args.questions)
+    sentence_count = bot.extractive_sentence_count()
+    print(f"📊 {len(questions)} questions, {bot.KNOWLEDGE_BASE_PATH}: {len(bot.kb_store.current())} chunks, "
+          f"{sentence_count} answerable sentences, "
+          f"LLM latency {'measured' if args.call_llm else f'assumed {args.llm_ms:.0f}ms'}")
+    if not sentence_count:
+        print("⚠️ No complete sentences in this knowledge base: extractive answers cannot fire")
+    print("-" * 72)
+    print(f"{'flow':<14}{'LLM calls':>11}{'extractive':>12}{'avoided':>10}{'p50 ms':>12}{'p95 ms':>12}")
+
+    baseline_llm = None
+    for name, extractive in (("current", False), ("extractive", True)):
+        latencies, paths = run_flow(bot, questions, extractive, args.call_llm, args.llm_ms)
+        llm_calls = paths.count("llm")
+        baseline_llm = llm_calls if baseline_llm is None else baseline_llm
+        avoided = 1 - llm_calls / baseline_llm if baseline_llm else 0.0
+        print(f"{name:<14}{llm_calls:>11}{paths.count('extractive'):>12}{avoided:>9.0%}"
+              f"{percentile(latencies, 50):>12.2f}{percentile(latencies, 95):>12.2f}")
+
+    print("-" * 72)
+    for question in questions:
+        answer = bot.get_extractive_answer(question)
+        print(f"{'✅' if answer else '🤖'} {question} -> {answer or 'LLM'}")
+
+
+if __name__ == "__main__":
+    main()
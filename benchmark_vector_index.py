@@ -0,0 +1,98 @@
+# benchmark_vector_index.py - Memory, QPS and recall@10 of quantized local indexes
+#
+# Usage:
+#   python benchmark_vector_index.py                      # synthetic 384-dim vectors
+#   python benchmark_vector_index.py --vectors 200000 --queries 2000
+#   python benchmark_vector_index.py --knowledge-base     # real chunks + MiniLM embeddings
+import argparse
+import json
+import time
+import numpy as np
+from vector_index import VectorIndex
+
+EMBEDDING_DIMENSION = 384  # all-MiniLM-L6-v2 dimension
+
+
+def synthetic_data(n_vectors, n_queries, dim, seed=0):
+    """Clustered unit vectors, so nearest neighbours are meaningful (unlike pure noise)."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(n_vectors // 50, 1), dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), n_vectors)]
+    vectors += 0.6 * rng.standard_normal((n_vectors, dim)).astype(np.float32)
+    queries = centers[rng.integers(0, len(centers), n_queries)]
+    queries += 0.6 * rng.standard_normal((n_queries, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return vectors, queries
+
+
+def knowledge_base_data(path, n_queries):
+    """Embed the local knowledge base; queries are its chunks' first sentences."""
+    from embedding_backend import load_embedding_backend
+    with open(path, 'r', encoding='utf-8') as f:
+        chunks = json.load(f)
+    model = load_embedding_backend()
+    texts = [chunk['text'] for chunk in chunks]
+    queries = [text.split('.')[0] for text in texts][:n_queries]
+    vectors = model.encode(texts, normalize_embeddings=True)
+    query_vectors = model.encode(queries, normalize_embeddings=True)
+    return vectors, query_vectors
+
+
+def run(index, queries, top_k, rescore, batch_size):
+    """Return (indices, queries per second) for the whole query set."""
+    results = []
+    start = time.perf_counter()
+    for i in range(0, len(queries), batch_size):
+        _, idx = index.search(queries[i:i + batch_size], top_k=top_k, rescore=rescore)
+        results.append(idx)
+    elapsed = time.perf_counter() - start
+    return np.vstack(results), len(queries) / elapsed
+
+
+def recall_at_k(found, truth):
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark float32 vs float16 vs int8 local vector indexes.")
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--rescore", type=int, default=50, help="int8 candidates re-scored from the float16 copy")
+    parser.add_argument("--batch-size", type=int, default=64, help="Queries per search call")
+    parser.add_argument("--knowledge-base", nargs="?", const="complete_knowledge_base.json",
+                        help="Use real knowledge base embeddings instead of synthetic vectors")
+    args = parser.parse_args()
+
+    if args.knowledge_base:
+        vectors, queries = knowledge_base_data(args.knowledge_base, args.queries)
+    else:
+        vectors, queries = synthetic_data(args.vectors, args.queries, EMBEDDING_DIMENSION)
+    top_k = min(args.top_k, len(vectors))
+
+    print(f"📊 {len(vectors)} vectors x {vectors.shape[1]} dims, {len(queries)} queries, recall@{top_k}")
+    print(f"   Python list of floats (.tolist()) would take ~{len(vectors) * (vectors.shape[1] * 32 + 56) / 1e6:.1f} MB")
+    print("-" * 78)
+    print(f"{'index':<26}{'memory MB':>12}{'vs float32':>12}{'QPS':>12}{'recall@' + str(top_k):>14}")
+
+    baseline = VectorIndex(vectors, "float32")
+    truth, baseline_qps = run(baseline, queries, top_k, 0, args.batch_size)
+    baseline_bytes = baseline.memory_bytes()
+
+    configs = [
+        ("float32", VectorIndex(vectors, "float32"), 0),
+        ("float16", VectorIndex(vectors, "float16"), 0),
+        ("int8", VectorIndex(vectors, "int8"), 0),
+        (f"int8 + rescore {args.rescore}", VectorIndex(vectors, "int8", keep_rescore_copy=True), args.rescore),
+    ]
+    for name, index, rescore in configs:
+        found, qps = (truth, baseline_qps) if name == "float32" else run(index, queries, top_k, rescore, args.batch_size)
+        memory = index.memory_bytes()
+        print(f"{name:<26}{memory / 1e6:>12.2f}{memory / baseline_bytes:>11.2f}x"
+              f"{qps:>12.0f}{recall_at_k(found, truth):>14.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,19 @@
 # ultra_brief_bot.py - FOSS-CIT Chatbot with Ultra Brief Responses
 import os
 import re
-import json
-from flask import Flask, request, jsonify
+import time
+from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
 from dotenv import load_dotenv
 from openai import OpenAI
+import reranker
+from admin import is_admin_request
+from knowledge_store import KnowledgeStore
+from extractive import build_sentence_index, best_sentence
+from metrics import LatencyStats
+from admission import RateLimiter, AdmissionController, client_id
+from query_log import QueryLog
+from profiling import RequestProfiler
 
 # Load environment variables
 load_dotenv()
@@ -13,6 +21,13 @@ load_dotenv()
 # Configuration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 CHAT_MODEL = os.getenv("OPENAI_CHAT_MODEL", "gpt-3.5-turbo")
+KNOWLEDGE_BASE_PATH = os.getenv("BRIEF_KNOWLEDGE_BASE_PATH", "comprehensive_knowledge_base.json")
+KB_WATCH_INTERVAL = float(os.getenv("KB_WATCH_INTERVAL", "0"))  # Seconds; 0 disables the watcher
+
+# Extractive answers: return the best knowledge base sentence instead of calling the LLM
+EXTRACTIVE_ANSWERS = os.getenv("EXTRACTIVE_ANSWERS", "false").lower() in ("1", "true", "yes")
+EXTRACTIVE_MIN_SCORE = float(os.getenv("EXTRACTIVE_MIN_SCORE", "0.33"))  # TF-IDF cosine
+EXTRACTIVE_MIN_COVERAGE = float(os.getenv("EXTRACTIVE_MIN_COVERAGE", "0.75"))  # Share of question weight matched
 
 # Initialize OpenAI client
 if OPENAI_API_KEY and OPENAI_API_KEY.startswith("sk-or-"):
@@ -29,22 +44,60 @@ else:
 app = Flask(__name__)
 CORS(app)
 
-# Load comprehensive knowledge base
-knowledge_base = []
-try:
-    with open("comprehensive_knowledge_base.json", "r", encoding="utf-8") as f:
-        knowledge_base = json.load(f)
-    print(f"📚 Loaded comprehensive knowledge base with {len(knowledge_base)} chunks")
-except FileNotFoundError:
-    print("⚠️  comprehensive_knowledge_base.json not found. Run comprehensive_train.py first.")
-except Exception as e:
-    print(f"❌ Error loading brief knowledge base: {e}")
+# Opt-in profiling of /chat requests (PROFILING_ENABLED or an admin X-Profile header)
+profiler = RequestProfiler({"chat"})
+profiler.install(app)
+
+def build_search_index(chunks):
+    """Pre-tokenize chunks and sentences once per snapshot instead of on every query."""
+    return {
+        'sentences': build_sentence_index(chunks),
+        'chunks': [
+            {
+                'text': chunk['text'],
+                'text_lower': chunk['text'].lower(),
+                'words': set(re.findall(r'\w+', chunk['text'].lower())),
+                'category': chunk.get('category', 'general')
+            }
+            for chunk in chunks
+        ]
+    }
+
+# Load comprehensive knowledge base; swapped atomically on reload
+kb_store = KnowledgeStore(KNOWLEDGE_BASE_PATH, build_search_index)
+kb_store.reload()
+kb_store.start_watcher(KB_WATCH_INTERVAL)
+
+def extractive_sentence_count():
+    """Sentences the extractive path can answer from in the current snapshot."""
+    sentence_index = kb_store.current().indexes.get('sentences')
+    return len(sentence_index['sentences']) if sentence_index else 0
+
+if EXTRACTIVE_ANSWERS and not extractive_sentence_count():
+    print(f"⚠️ EXTRACTIVE_ANSWERS is on, but {KNOWLEDGE_BASE_PATH} has no complete sentences; every question will use the LLM")
+
+# Answer path counters and latencies for /stats
+answer_stats = LatencyStats()
+
+# Load protection: per-client token buckets and a global cap on LLM calls
+rate_limiter = RateLimiter()
+llm_admission = AdmissionController()
+
+# Questions and answer paths, appended to a JSONL log by a background thread
+query_log = QueryLog(os.getenv("BRIEF_QUERY_LOG_PATH", "logs/brief_queries.jsonl"))
+
+# Optional cross-encoder re-ranking stage
+if reranker.RERANK_ENABLED:
+    reranker.warm_up()
 
 # -----------------------
 # Ultra Brief Responses
 # -----------------------
 def get_ultra_brief_answer(question: str):
-    """Get ultra brief answers - 1 sentence maximum."""
+    """Get ultra brief answers - 1 sentence maximum.
+
+    Returns (answer, path) where path is one of: hardcoded, rule, extractive, llm, shed, fallback.
+    """
     question_lower = question.lower().strip()
     
     # Hard-coded ultra brief responses
@@ -106,7 +159,7 @@ def get_ultra_brief_answer(question: str):
     # Check for exact matches first
     for key, answer in ultra_brief.items():
         if key in question_lower:
-            return answer
+            return answer, "hardcoded"
     
     # Search knowledge base for specific info
     context = search_comprehensive_knowledge(question, top_k=2)
@@ -114,26 +167,48 @@ def get_ultra_brief_answer(question: str):
     if context:
         # Extract key info from context
         if 'mission' in question_lower or 'objective' in question_lower:
-            return "To assist students in learning essential technical skills and work with open-source platforms."
+            return "To assist students in learning essential technical skills and work with open-source platforms.", "rule"
         elif 'activity' in question_lower or 'do' in question_lower:
-            return "Bootcamps, workshops, coding contests, hackathons, and career guidance."
+            return "Bootcamps, workshops, coding contests, hackathons, and career guidance.", "rule"
         elif 'member' in question_lower:
-            return "500+ active members."
+            return "500+ active members.", "rule"
         elif 'contact' in question_lower or 'location' in question_lower:
-            return "Email: fosscit@gmail.com, CIT Coimbatore."
+            return "Email: fosscit@gmail.com, CIT Coimbatore.", "rule"
         elif 'team' in question_lower:
-            return "Tharun Kailash K (Lead), Vignaraj D, Shriram R."
-        else:
-            # Use AI for ultra brief response
-            return generate_ai_brief_answer(question, context)
+            return "Tharun Kailash K (Lead), Vignaraj D, Shriram R.", "rule"
+        
+        # Answer from a precomputed sentence when the match is confident
+        if EXTRACTIVE_ANSWERS:
+            answer = get_extractive_answer(question)
+            if answer:
+                return answer, "extractive"
+        
+        # Use AI for ultra brief response, unless the LLM queue is saturated
+        with llm_admission.slot() as admitted:
+            if admitted:
+                return generate_ai_brief_answer(question, context), "llm"
+        
+        # Shed: best local sentence regardless of confidence
+        answer = get_extractive_answer(question, min_score=0.0, min_coverage=0.0)
+        return answer or "I'm answering a lot of questions right now. Please try again shortly.", "shed"
     
     # Fallback for general questions
     if any(word in question_lower for word in ['programming', 'code', 'software']):
-        return "Programming is writing code to create software. Start with Python."
+        return "Programming is writing code to create software. Start with Python.", "fallback"
     elif any(word in question_lower for word in ['career', 'job', 'work']):
-        return "Focus on learning one programming language well and building projects."
+        return "Focus on learning one programming language well and building projects.", "fallback"
     else:
-        return "I help with FOSS-CIT info. Ask about activities, team, or contact details."
+        return "I help with FOSS-CIT info. Ask about activities, team, or contact details.", "fallback"
+
+def get_extractive_answer(question: str, min_score=None, min_coverage=None):
+    """Best-matching knowledge base sentence, or None when confidence is low."""
+    min_score = EXTRACTIVE_MIN_SCORE if min_score is None else min_score
+    min_coverage = EXTRACTIVE_MIN_COVERAGE if min_coverage is None else min_coverage
+    
+    sentence, score, coverage = best_sentence(kb_store.current().indexes.get('sentences'), question)
+    if sentence and score >= min_score and coverage >= min_coverage:
+        return sentence
+    return None
 
 def generate_ai_brief_answer(question: str, context: str):
     """Generate AI answer with comprehensive context but brief output."""
@@ -167,7 +242,8 @@ def generate_ai_brief_answer(question: str, context: str):
 
 def search_comprehensive_knowledge(query, top_k=2):
     """Enhanced search for comprehensive knowledge base with category scoring."""
-    if not knowledge_base:
+    snapshot = kb_store.current()
+    if not snapshot.chunks:
         return ""
     
     query_lower = query.lower().strip()
@@ -181,10 +257,10 @@ def search_comprehensive_knowledge(query, top_k=2):
     
     scored_chunks = []
     
-    for chunk in knowledge_base:
-        chunk_text_lower = chunk['text'].lower()
-        chunk_words = set(re.findall(r'\w+', chunk_text_lower))
-        category = chunk.get('category', 'general')
+    for chunk in snapshot.indexes['chunks']:
+        chunk_text_lower = chunk['text_lower']
+        chunk_words = chunk['words']
+        category = chunk['category']
         
         # Base scoring
         score = len(query_words.intersection(chunk_words))
@@ -221,7 +297,11 @@ def search_comprehensive_knowledge(query, top_k=2):
     scored_chunks.sort(key=lambda x: x[0], reverse=True)
     
     if scored_chunks:
-        results = [chunk[1] for chunk in scored_chunks[:top_k]]
+        if reranker.RERANK_ENABLED:
+            candidates = [chunk[1] for chunk in scored_chunks[:reranker.RERANK_TOP_N]]
+            results = reranker.rerank(query, candidates, top_k=top_k)
+        else:
+            results = [chunk[1] for chunk in scored_chunks[:top_k]]
         return " ".join(results)
     
     return ""
@@ -231,6 +311,16 @@ def search_comprehensive_knowledge(query, top_k=2):
 # -----------------------
 @app.route("/chat", methods=["POST"])
 def chat():
+    allowed, retry_after = rate_limiter.check(client_id(request))
+    if not allowed:
+        response = jsonify({
+            "answer": "Too many questions, please slow down.",
+            "status": "rate_limited",
+            "retry_after": round(retry_after, 2)
+        })
+        response.headers["Retry-After"] = str(max(int(retry_after + 0.999), 1))
+        return response, 429
+
     try:
         data = request.get_json(force=True)
         question = data.get("question", "").strip()
@@ -244,14 +334,20 @@ def chat():
         print(f"❓ Question: {question}")
         
         # Get ultra brief answer
-        answer = get_ultra_brief_answer(question)
+        start = time.perf_counter()
+        answer, path = get_ultra_brief_answer(question)
+        latency_ms = (time.perf_counter() - start) * 1000
+        answer_stats.record(path, latency_ms)
+        query_log.log({"question": question, "origin": "chat", "path": path,
+                       "cache": None, "latency_ms": round(latency_ms, 2)})
         
-        print(f"💬 Answer: {answer}")
+        print(f"💬 Answer ({path}): {answer}")
         
         return jsonify({
             "answer": answer,
             "status": "success",
-            "response_type": "professional"
+            "response_type": "professional",
+            "answer_path": path
         })
 
     except Exception as e:
@@ -267,9 +363,84 @@ def health():
         "status": "online",
         "mode": "professional",
         "max_response": "direct_answers",
-        "chunks": len(knowledge_base)
+        "chunks": len(kb_store.current()),
+        "knowledge_version": kb_store.current().version,
+        "reranker": reranker.stats()
+    })
+
+@app.route("/stats", methods=["GET"])
+def stats():
+    paths = answer_stats.snapshot()
+    llm_calls = answer_stats.count("llm")
+    extractive = answer_stats.count("extractive")
+    return jsonify({
+        "extractive_answers": EXTRACTIVE_ANSWERS,
+        "extractive_sentences": extractive_sentence_count(),
+        # Share of questions that would have gone to the LLM but were answered locally
+        "llm_avoidance_rate": round(extractive / (llm_calls + extractive), 4) if llm_calls + extractive else 0.0,
+        "paths": paths,
+        "rate_limiter": rate_limiter.stats(),
+        "llm_admission": llm_admission.stats(),
+        "query_log": query_log.stats()
     })
 
+@app.route("/admin/reload", methods=["POST"])
+def admin_reload():
+    # ?wait=1 blocks until the reload report is ready
+    if not is_admin_request(request):
+        return jsonify({"error": "Forbidden"}), 403
+
+    if request.args.get("wait"):
+        return jsonify(kb_store.reload())
+
+    started = kb_store.reload_async()
+    return jsonify({"status": "started" if started else "in_progress"}), 202
+
+@app.route("/admin/knowledge", methods=["GET"])
+def admin_knowledge():
+    if not is_admin_request(request):
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify(kb_store.status())
+
+@app.route("/admin/profiles", methods=["GET"])
+def admin_profiles():
+    if not is_admin_request(request):
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify({"stats": profiler.stats(), "profiles": profiler.profiles()})
+
+@app.route("/admin/profiles/<int:profile_id>", methods=["GET"])
+def admin_profile(profile_id):
+    # Collapsed stacks or a pstats file; ?format=text summarizes cProfile runs
+    if not is_admin_request(request):
+        return jsonify({"error": "Forbidden"}), 403
+    
+    if request.args.get("format") == "text":
+        summary = profiler.summary(profile_id)
+        if summary is None:
+            return jsonify({"error": "No cProfile profile with that id"}), 404
+        return Response(summary, mimetype="text/plain")
+    
+    exported = profiler.export(profile_id)
+    if exported is None:
+        return jsonify({"error": "Profile not found"}), 404
+    filename, mimetype, data = exported
+    return Response(data, mimetype=mimetype,
+                    headers={"Content-Disposition": f"attachment; filename={filename}"})
+
+@app.route("/admin/profiles/flamegraph", methods=["GET"])
+def admin_flamegraph():
+    if not is_admin_request(request):
+        return jsonify({"error": "Forbidden"}), 403
+    return Response(profiler.flamegraph(), mimetype="text/plain",
+                    headers={"Content-Disposition": "attachment; filename=flamegraph.collapsed"})
+
+@app.route("/admin/memory", methods=["GET"])
+def admin_memory():
+    # tracemalloc snapshot and the top allocation growth since the previous call
+    if not is_admin_request(request):
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify(profiler.memory_report())
+
 @app.route("/chat.html", methods=["GET"])
 def chat_page():
     try:
@@ -299,7 +470,7 @@ def home():
         <div class="status">
             <h3>✅ Status: Professional Mode</h3>
             <p><strong>Response Style:</strong> Direct, professional answers</p>
-            <p><strong>Knowledge Base:</strong> {len(knowledge_base)} optimized chunks</p>
+            <p><strong>Knowledge Base:</strong> {len(kb_store.current())} optimized chunks</p>
             <p><strong>Focus:</strong> Relevant, to-the-point responses</p>
         </div>
 
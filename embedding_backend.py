@@ -0,0 +1,236 @@
+# embedding_backend.py - Pluggable embedding backends (PyTorch or ONNX Runtime)
+#
+# Select with EMBEDDING_BACKEND=sentence-transformers (default) or EMBEDDING_BACKEND=onnx.
+#
+#   python embedding_backend.py --export          # export + int8-quantize the ONNX model
+#   python embedding_backend.py --check-parity    # compare ONNX against sentence-transformers
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Configuration
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "sentence-transformers")
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "onnx_model")
+ONNX_QUANTIZE = os.getenv("ONNX_QUANTIZE", "true").lower() in ("1", "true", "yes")
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))  # 0 lets ONNX Runtime pick
+
+PARITY_MIN_COSINE = 0.98  # int8 weights cost a little precision; fp32 export is ~1.0
+
+
+class SentenceTransformerBackend:
+    """The original PyTorch path through sentence-transformers."""
+
+    name = "sentence-transformers"
+
+    def __init__(self, model_name=EMBEDDING_MODEL_NAME):
+        from sentence_transformers import SentenceTransformer
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=True):
+        return self.model.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=normalize_embeddings
+        ).astype(np.float32)
+
+
+class OnnxBackend:
+    """ONNX Runtime on CPU with mean pooling, matching the sentence-transformers pipeline."""
+
+    name = "onnx"
+
+    def __init__(self, model_name=EMBEDDING_MODEL_NAME, model_dir=ONNX_MODEL_DIR,
+                 quantize=ONNX_QUANTIZE, threads=ONNX_THREADS):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_path = onnx_model_path(model_dir, quantize)
+        config = read_export_config(model_dir)
+        if not os.path.exists(model_path) or config.get("model_name") != model_name:
+            if os.path.exists(model_path):
+                # Embeddings from another model would not match the Pinecone index
+                print(f"🔄 {model_dir} holds {config.get('model_name')!r}, re-exporting {model_name!r}...")
+            export_onnx(model_name, model_dir, quantize)
+            config = read_export_config(model_dir)
+
+        self.max_seq_length = config["max_seq_length"]
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.model_name = model_name
+        self.name = f"onnx{'-int8' if quantize else ''}"
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=True):
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+
+        # Batch texts of similar length together to minimise padding
+        order = sorted(range(len(texts)), key=lambda i: -len(texts[i]))
+        sorted_texts = [texts[i] for i in order]
+
+        batches = []
+        for start in range(0, len(sorted_texts), batch_size):
+            tokens = self.tokenizer(
+                sorted_texts[start:start + batch_size], padding=True, truncation=True,
+                max_length=self.max_seq_length, return_tensors="np"
+            )
+            inputs = {name: tokens[name].astype(np.int64) for name in self.input_names}
+            hidden = self.session.run(None, inputs)[0]
+
+            # Mean pooling over real (non-padding) tokens
+            mask = tokens["attention_mask"][:, :, None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            batches.append(pooled.astype(np.float32))
+
+        embeddings = np.empty((0, 0), dtype=np.float32)
+        if batches:
+            embeddings = np.empty_like(np.vstack(batches))
+            embeddings[order] = np.vstack(batches)
+        if normalize_embeddings and len(embeddings):
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings[0] if single else embeddings
+
+
+def onnx_model_path(model_dir, quantize):
+    return os.path.join(model_dir, "model_int8.onnx" if quantize else "model.onnx")
+
+
+def read_export_config(model_dir):
+    """embedding_config.json written by export_onnx ({} if the model was never exported)."""
+    try:
+        with open(os.path.join(model_dir, "embedding_config.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def export_onnx(model_name=EMBEDDING_MODEL_NAME, model_dir=ONNX_MODEL_DIR, quantize=ONNX_QUANTIZE):
+    """Export the transformer to ONNX (dynamic batch/sequence axes) and optionally int8-quantize it."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    print(f"📦 Exporting {model_name} to ONNX in {model_dir}/...")
+    os.makedirs(model_dir, exist_ok=True)
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+
+    class LastHiddenState(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.model(input_ids=input_ids, attention_mask=attention_mask,
+                              token_type_ids=token_type_ids).last_hidden_state
+
+    sample = tokenizer(["FOSS-CIT export sample"], return_tensors="pt")
+    fp32_path = onnx_model_path(model_dir, quantize=False)
+    dynamic = {0: "batch", 1: "sequence"}
+    with torch.no_grad():
+        torch.onnx.export(
+            LastHiddenState(transformer),
+            (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={"input_ids": dynamic, "attention_mask": dynamic,
+                          "token_type_ids": dynamic, "last_hidden_state": dynamic},
+            opset_version=17
+        )
+
+    tokenizer.save_pretrained(model_dir)
+    with open(os.path.join(model_dir, "embedding_config.json"), "w", encoding="utf-8") as f:
+        json.dump({"model_name": model_name, "max_seq_length": st_model.max_seq_length}, f, indent=2)
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(fp32_path, onnx_model_path(model_dir, quantize=True), weight_type=QuantType.QInt8)
+    print(f"✅ ONNX model ready: {onnx_model_path(model_dir, quantize)}")
+
+
+def load_embedding_backend(name=EMBEDDING_BACKEND):
+    """Create the configured backend; falls back to sentence-transformers if ONNX fails."""
+    if name == "onnx":
+        try:
+            backend = OnnxBackend()
+            print(f"✅ Using ONNX Runtime embeddings ({backend.name}, threads={ONNX_THREADS or 'auto'})")
+            return backend
+        except Exception as e:
+            print(f"⚠️ ONNX backend unavailable, using sentence-transformers: {e}")
+    elif name != "sentence-transformers":
+        print(f"⚠️ Unknown EMBEDDING_BACKEND {name!r}, using sentence-transformers")
+    return SentenceTransformerBackend()
+
+
+def check_parity(texts, quantize=ONNX_QUANTIZE):
+    """Compare ONNX against sentence-transformers on `texts`; returns True if they agree."""
+    reference = SentenceTransformerBackend()
+    candidate = OnnxBackend(quantize=quantize)
+
+    timings = {}
+    outputs = {}
+    for backend in (reference, candidate):
+        backend.encode(texts[:4])  # warm-up
+        start = time.perf_counter()
+        outputs[backend.name] = backend.encode(texts)
+        timings[backend.name] = (time.perf_counter() - start) * 1000 / len(texts)
+
+    expected, actual = outputs[reference.name], outputs[candidate.name]
+    cosines = (expected * actual).sum(axis=1)
+
+    # Retrieval agreement: does each text still find the same nearest neighbours?
+    k = min(5, len(texts))
+    ref_top = np.argsort(-(expected @ expected.T), axis=1)[:, :k]
+    new_top = np.argsort(-(actual @ expected.T), axis=1)[:, :k]
+    overlap = np.mean([len(set(a) & set(b)) / k for a, b in zip(ref_top, new_top)])
+
+    print(f"📊 Parity on {len(texts)} texts ({candidate.name} vs {reference.name})")
+    print(f"   cosine min/mean: {cosines.min():.4f} / {cosines.mean():.4f} (required >= {PARITY_MIN_COSINE})")
+    print(f"   top-{k} neighbour overlap: {overlap:.3f}")
+    for name, ms in timings.items():
+        print(f"   {name}: {ms:.2f} ms/text")
+    return bool(cosines.min() >= PARITY_MIN_COSINE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and verify the ONNX embedding backend.")
+    parser.add_argument("--export", action="store_true", help="Export (and quantize) the ONNX model")
+    parser.add_argument("--check-parity", action="store_true", help="Compare ONNX with sentence-transformers")
+    parser.add_argument("--no-quantize", action="store_true", help="Use the fp32 ONNX model")
+    parser.add_argument("--knowledge-base", default="complete_knowledge_base.json")
+    args = parser.parse_args()
+
+    quantize = ONNX_QUANTIZE and not args.no_quantize
+    if args.export:
+        export_onnx(quantize=quantize)
+    if args.check_parity:
+        with open(args.knowledge_base, "r", encoding="utf-8") as f:
+            texts = [chunk["text"] for chunk in json.load(f)]
+        texts += ["Who founded FOSS-CIT?", "How can I contribute to open source?", "hi"]
+        if not check_parity(texts, quantize=quantize):
+            print("❌ ONNX embeddings diverge from sentence-transformers")
+            sys.exit(1)
+        print("✅ ONNX backend matches sentence-transformers")
+    if not (args.export or args.check_parity):
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# extractive.py - Sentence-level extractive answers from precomputed TF-IDF vectors
+import math
+import re
+from collections import Counter, defaultdict
+
+STOP_WORDS = {
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by',
+    'is', 'are', 'was', 'were', 'be', 'what', 'who', 'how', 'when', 'where', 'which', 'why',
+    'do', 'does', 'did', 'can', 'i', 'me', 'you', 'your', 'it', 'this', 'that', 'about', 'tell'
+}
+MIN_WORDS = 5
+MAX_WORDS = 40  # Longer sentences are skipped, never cut: an answer must be a whole sentence
+
+
+def tokenize(text):
+    """Lowercase word tokens without stop words; plural 's' is dropped so 'roles' matches 'role'."""
+    return [w[:-1] if len(w) > 3 and w.endswith('s') and not w.endswith('ss') else w
+            for w in re.findall(r'\w+', text.lower()) if w not in STOP_WORDS]
+
+
+def is_heading(words):
+    """True if the text carries a heading, e.g. 'CODE OF CONDUCT Misbehavior of ...'.
+
+    A heading shows up as two or more consecutive all-caps words; punctuation-only
+    tokens like '&' don't break the run, and hyphenated names like FOSS-CIT don't count.
+    """
+    run = 0
+    for word in words:
+        if not any(c.isalnum() for c in word):
+            continue
+        run = run + 1 if word.isalpha() and word.isupper() and len(word) > 1 else 0
+        if run >= 2:
+            return True
+    return False
+
+
+def split_sentences(text):
+    """Split chunk text into complete sentences that can be returned as answers.
+
+    Only text that starts like a sentence and ends at a real boundary (. ! ?) in
+    the source is kept. Bullet items, headings, chunk-overlap fragments that start
+    mid-word, unterminated runs (knowledge bases built before chunks kept their
+    punctuation) and over-long sentences are dropped, so a question that only
+    matches them falls back to the LLM.
+    """
+    text = re.sub(r'--- Page \d+ ---', '\n', text)
+    sentences = []
+    for block in re.split(r'[●•\n]+', text):
+        for sentence in re.split(r'(?<=[.!?])\s+', block.strip()):
+            words = sentence.split()
+            if words and (sentence[0].isupper() or sentence[0].isdigit()) and sentence.endswith(('.', '!', '?')) \
+                    and MIN_WORDS <= len(words) <= MAX_WORDS and not is_heading(words):
+                sentences.append(' '.join(words))
+    return sentences
+
+
+def build_sentence_index(chunks):
+    """Split all chunks into sentences and precompute unit-length TF-IDF vectors.
+
+    Returns an inverted index (term -> [(sentence_id, weight)]) so a query only
+    touches sentences that share a term with it.
+    """
+    sentences = []
+    seen = set()
+    for chunk in chunks:
+        for sentence in split_sentences(chunk['text']):
+            key = sentence.lower()
+            if key not in seen:  # Overlapping chunks repeat sentences
+                seen.add(key)
+                sentences.append(sentence)
+
+    term_counts = [Counter(tokenize(sentence)) for sentence in sentences]
+    document_frequency = Counter(term for counts in term_counts for term in counts)
+    total = len(sentences)
+    idf = {term: math.log((1 + total) / (1 + df)) + 1 for term, df in document_frequency.items()}
+
+    postings = defaultdict(list)
+    for sentence_id, counts in enumerate(term_counts):
+        weights = {term: (1 + math.log(tf)) * idf[term] for term, tf in counts.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        for term, weight in weights.items():
+            postings[term].append((sentence_id, weight / norm))
+
+    return {'sentences': sentences, 'idf': idf, 'postings': dict(postings)}
+
+
+def best_sentence(index, question):
+    """Return (sentence, cosine score, coverage) for the best-matching sentence.
+
+    Coverage is the share of the question's TF-IDF weight found in that sentence,
+    so a single rare word cannot carry a match on its own.
+    """
+    if not index or not index['sentences']:
+        return None, 0.0, 0.0
+
+    counts = Counter(tokenize(question))
+    idf = index['idf']
+    unseen_idf = math.log(1 + len(index['sentences'])) + 1  # Words no sentence contains
+    weights = {term: (1 + math.log(tf)) * idf.get(term, unseen_idf) for term, tf in counts.items()}
+    total_weight = sum(weights.values())
+    weights = {term: weight for term, weight in weights.items() if term in idf}
+    if not weights:
+        return None, 0.0, 0.0
+    norm = math.sqrt(sum(w * w for w in weights.values()))
+
+    scores = defaultdict(float)
+    covered = defaultdict(float)
+    for term, weight in weights.items():
+        for sentence_id, sentence_weight in index['postings'][term]:
+            scores[sentence_id] += weight * sentence_weight
+            covered[sentence_id] += weight
+
+    sentence_id, score = max(scores.items(), key=lambda item: item[1])
+    return index['sentences'][sentence_id], score / norm, covered[sentence_id] / total_weight
@@ -0,0 +1,174 @@
+# hot_questions.py - Mine frequent questions from the query log and precompute their answers
+#
+# Usage:
+#   python hot_questions.py --dry-run                  # list the hot questions only
+#   python hot_questions.py --top 50 --min-count 3     # answer them and write hot_answers.json
+#   python hot_questions.py --days 7 --namespace foss-cit
+#
+# Run it offline (e.g. nightly). It reads the Pinecone bot's query log, including
+# rotated files, and counts questions per namespace by their normalized form (the
+# answer cache key). Then it answers the most frequent ones through the normal
+# batch pipeline and stores each answer with its query embedding. At startup the bot
+# loads the file, pins each namespace's answers (checked before the answer cache,
+# with no TTL) and reuses the stored embeddings, so hot questions skip both the
+# LLM and the embedding model. The file records the knowledge base hash and the
+# embedding model it was computed with; the bot ignores answers or embeddings
+# that no longer match.
+# POST /admin/hot-answers loads a new file without a restart.
+import argparse
+import json
+import os
+import time
+from collections import Counter, defaultdict
+from dotenv import load_dotenv
+from answer_cache import normalize_question
+from query_log import QUERY_LOG_PATH, rotated_files
+
+load_dotenv()
+
+HOT_ANSWERS_PATH = os.getenv("HOT_ANSWERS_PATH", "hot_answers.json")
+
+
+def mine_hot_questions(log_path=QUERY_LOG_PATH, top=50, min_count=3, since=None, default_namespace=None):
+    """Return {namespace: [(question, count), ...]} for the most asked live questions.
+
+    Only interactive traffic counts (batch runs and this job are excluded). Each
+    question is reported in its most common original phrasing.
+    """
+    counts = defaultdict(Counter)
+    phrasings = defaultdict(lambda: defaultdict(Counter))
+    for path in rotated_files(log_path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # A line cut short by a crash
+                if record.get("origin", "chat") != "chat" or not record.get("question"):
+                    continue
+                if since and record.get("ts", 0) < since:
+                    continue
+                namespace = record.get("namespace") or default_namespace
+                key = normalize_question(record["question"])
+                if key:
+                    counts[namespace][key] += 1
+                    phrasings[namespace][key][record["question"].strip()] += 1
+
+    hot = {}
+    for namespace, counter in counts.items():
+        hot[namespace] = [
+            (phrasings[namespace][key].most_common(1)[0][0], count)
+            for key, count in counter.most_common(top) if count >= min_count
+        ]
+    return hot
+
+
+def load_hot_answers(path=HOT_ANSWERS_PATH):
+    """Read hot_answers.json; returns its contents, or {} if there is none.
+
+    "namespaces" maps each namespace to its entries, "knowledge_bases" to the
+    content hash its answers were computed from, and "embedding" names the
+    model and backend behind the stored embeddings.
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception as e:
+        print(f"⚠️ Could not load hot answers from {path}: {e}")
+        return {}
+    namespaces = data.get("namespaces", {})
+    print(f"🔥 Loaded {sum(len(entries) for entries in namespaces.values())} precomputed hot answers from {path}")
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute answers and embeddings for the most asked questions.")
+    parser.add_argument("--log", default=QUERY_LOG_PATH, help="Query log to mine (rotated files are included)")
+    parser.add_argument("-o", "--output", default=HOT_ANSWERS_PATH, help="Where to write the hot answers")
+    parser.add_argument("--top", type=int, default=50, help="Questions kept per namespace")
+    parser.add_argument("--min-count", type=int, default=3, help="Minimum times a question was asked")
+    parser.add_argument("--days", type=float, default=None, help="Only count the last N days of traffic")
+    parser.add_argument("-n", "--namespace", default=None, help="Only this namespace (default: all)")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="Parallel LLM calls")
+    parser.add_argument("--dry-run", action="store_true", help="Print the hot questions without answering them")
+    args = parser.parse_args()
+
+    from namespaces import DEFAULT_NAMESPACE
+
+    since = time.time() - args.days * 86400 if args.days else None
+    hot = mine_hot_questions(args.log, args.top, args.min_count, since, DEFAULT_NAMESPACE)
+    if args.namespace:
+        hot = {args.namespace: hot.get(args.namespace, [])}
+
+    for namespace, questions in hot.items():
+        print(f"🏘️ {namespace}: {len(questions)} hot questions")
+        for question, count in questions:
+            print(f"  {count:>6}  {question}")
+    if args.dry_run or not any(hot.values()):
+        return
+
+    import openrouter_pinecone_bot as bot
+
+    # The running bot owns the query log; a second writer would race its rotation
+    bot.query_log.enabled = False
+
+    output = {
+        "generated_at": time.time(),
+        "log": args.log,
+        "embedding": {"model": bot.embedding_model.model_name, "backend": bot.embedding_model.name},
+        "knowledge_bases": {},
+        "namespaces": {}
+    }
+    for namespace, questions in hot.items():
+        if not questions:
+            continue
+        try:
+            tenant = bot.namespaces.get(namespace)
+        except KeyError:
+            print(f"⚠️ Skipping unknown namespace: {namespace}")
+            continue
+        # Answer afresh rather than from the previous run's file
+        tenant.pinned_answers = {}
+        tenant.answer_cache.clear()
+        snapshot = tenant.kb_store.current()
+
+        texts = [question for question, _ in questions]
+        embeddings = bot.get_embeddings(texts)
+        batch = [{'id': i, 'message': question} for i, question in enumerate(texts)]
+        entries = []
+        admission = bot.offline_admission(args.concurrency)
+        for result in bot.answer_batch(batch, concurrency=args.concurrency, tenant=tenant, admission=admission):
+            if 'error' in result or result['degraded'] or result['response'] == bot.AI_ERROR_RESPONSE:
+                print(f"⚠️ No answer cached for: {result['message']}")
+                continue
+            i = result['id']
+            entries.append({
+                "question": texts[i],
+                "count": questions[i][1],
+                "embedding": [round(float(x), 6) for x in embeddings[i]] if embeddings is not None else None,
+                "answer": {
+                    "response": result['response'],
+                    "sources_used": result['sources_used'],
+                    "search_method": result['search_method']
+                }
+            })
+        if tenant.kb_store.current() is not snapshot:
+            print(f"⚠️ Skipping {namespace}: its knowledge base was reloaded while answering")
+            continue
+        entries.sort(key=lambda entry: entry["count"], reverse=True)
+        output["knowledge_bases"][namespace] = snapshot.content_hash
+        output["namespaces"][namespace] = entries
+        print(f"✅ {namespace}: precomputed {len(entries)}/{len(questions)} answers")
+
+    # Write atomically so a bot loading the file never sees a partial one
+    temp_path = f"{args.output}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(output, f, ensure_ascii=False)
+    os.replace(temp_path, args.output)
+    print(f"💾 Wrote {args.output}. Restart the bot or POST /admin/hot-answers to load it.")
+
+
+if __name__ == "__main__":
+    main()
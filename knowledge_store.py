@@ -0,0 +1,195 @@
+# knowledge_store.py - Hot-reloadable knowledge base snapshots
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import weakref
+
+
+def estimate_bytes(obj, _seen=None):
+    """Approximate memory held by `obj`: sys.getsizeof over containers, plus
+    `nbytes` for numpy arrays and `memory_bytes()` for index objects.
+
+    Walks the structures instead of tracing allocations, so the estimate costs
+    nothing for concurrent requests and isn't inflated by their allocations.
+    """
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if hasattr(obj, "memory_bytes"):
+        return obj.memory_bytes()
+    if hasattr(obj, "nbytes"):
+        return int(obj.nbytes)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_bytes(k, seen) + estimate_bytes(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(estimate_bytes(item, seen) for item in obj)
+    return size
+
+
+class KnowledgeSnapshot:
+    """An immutable knowledge base plus the indexes built from it.
+
+    Request handlers grab one snapshot via `KnowledgeStore.current()` and use it for
+    the whole request, so a reload never changes data under a running request. An
+    old snapshot is freed once the last request holding it finishes.
+    `content_hash` (sha256 of the file) identifies the data across reloads and
+    restarts, unlike `version`, which counts reloads in this process.
+    """
+
+    def __init__(self, chunks, indexes, path, version, mtime, load_ms, memory_bytes, content_hash=None):
+        self.chunks = chunks
+        self.indexes = indexes
+        self.path = path
+        self.version = version
+        self.mtime = mtime
+        self.load_ms = load_ms
+        self.memory_bytes = memory_bytes
+        self.content_hash = content_hash
+        self.loaded_at = time.time()
+
+    def __len__(self):
+        return len(self.chunks)
+
+
+class KnowledgeStore:
+    """Holds the current snapshot and swaps in new ones built off the request path.
+
+    `build_indexes(chunks)` returns a dict of derived structures (embedding matrix,
+    token sets, ...) and runs in the reload thread, never in a request.
+    `on_swap(snapshot)` runs after each successful swap (e.g. to drop cached answers).
+    """
+
+    def __init__(self, path, build_indexes=None, on_swap=None):
+        self.path = path
+        self.build_indexes = build_indexes or (lambda chunks: {})
+        self.on_swap = on_swap
+        self._snapshot = KnowledgeSnapshot([], {}, path, 0, None, 0.0, 0)
+        self._swap_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._retired = weakref.WeakSet()
+        self._watcher = None
+        self._stop_watching = threading.Event()
+        self.last_report = None
+
+    def current(self):
+        """Return the active snapshot; callers should keep the reference for the request."""
+        return self._snapshot
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.path)
+            return (stat.st_mtime, stat.st_size)
+        except OSError:
+            return None
+
+    def _build(self):
+        """Load the file and build indexes, measuring time and estimated memory."""
+        start = time.perf_counter()
+        signature = self._file_signature()
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        chunks = json.loads(data.decode('utf-8'))
+        indexes = self.build_indexes(chunks)
+        load_ms = (time.perf_counter() - start) * 1000
+
+        return KnowledgeSnapshot(
+            chunks, indexes, self.path, self._snapshot.version + 1,
+            signature[0] if signature else None, load_ms, estimate_bytes((chunks, indexes)),
+            hashlib.sha256(data).hexdigest()
+        )
+
+    def reload(self):
+        """Build a new snapshot and swap it in; returns a report dict.
+
+        On failure the current snapshot stays active. Only one reload runs at a time.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            return {"status": "in_progress"}
+        try:
+            previous = self._snapshot
+            try:
+                snapshot = self._build()
+            except FileNotFoundError:
+                print(f"⚠️ {self.path} not found. Run training script first.")
+                report = {"status": "error", "error": f"{self.path} not found", "version": previous.version}
+                self.last_report = report
+                return report
+            except Exception as e:
+                print(f"❌ Error loading knowledge base: {e}")
+                report = {"status": "error", "error": str(e), "version": previous.version}
+                self.last_report = report
+                return report
+
+            with self._swap_lock:
+                self._snapshot = snapshot
+            if previous.version:
+                self._retired.add(previous)
+            if self.on_swap:
+                self.on_swap(snapshot)
+
+            report = {
+                "status": "ok",
+                "version": snapshot.version,
+                "chunks": len(snapshot),
+                "reload_ms": round(snapshot.load_ms, 2),
+                "snapshot_bytes": snapshot.memory_bytes,
+                # Both snapshots live until in-flight requests release the old one
+                "swap_overhead_bytes": snapshot.memory_bytes + (previous.memory_bytes if previous.version else 0)
+            }
+            self.last_report = report
+            print(f"📚 Loaded knowledge base v{snapshot.version} with {len(snapshot)} chunks "
+                  f"in {snapshot.load_ms:.0f}ms (~{snapshot.memory_bytes / 1e6:.1f} MB)")
+            return report
+        finally:
+            self._reload_lock.release()
+
+    def reload_async(self):
+        """Start a reload in a background thread; returns False if one is already running."""
+        if self._reload_lock.locked():
+            return False
+        threading.Thread(target=self.reload, name="kb-reload", daemon=True).start()
+        return True
+
+    def start_watcher(self, interval):
+        """Poll the knowledge base file every `interval` seconds and reload when it changes."""
+        if interval <= 0 or self._watcher:
+            return
+
+        def watch():
+            last_signature = self._file_signature()
+            while not self._stop_watching.wait(interval):
+                signature = self._file_signature()
+                if signature and signature != last_signature:
+                    print(f"🔄 {self.path} changed, reloading in background...")
+                    self.reload()
+                    last_signature = signature
+
+        self._watcher = threading.Thread(target=watch, name="kb-watcher", daemon=True)
+        self._watcher.start()
+        print(f"👀 Watching {self.path} for changes every {interval}s")
+
+    def stop_watcher(self):
+        """Stop the file watcher (if any) after its current poll."""
+        self._stop_watching.set()
+        self._watcher = None
+
+    def status(self):
+        """Snapshot details for health/admin endpoints."""
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version,
+            "chunks": len(snapshot),
+            "path": self.path,
+            "content_hash": snapshot.content_hash,
+            "loaded_at": snapshot.loaded_at,
+            "snapshot_bytes": snapshot.memory_bytes,
+            "reloading": self._reload_lock.locked(),
+            "retired_snapshots_alive": len(self._retired),
+            "last_reload": self.last_report
+        }
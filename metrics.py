@@ -0,0 +1,54 @@
+# metrics.py - Thread-safe counters and latency percentiles for the stats endpoints
+import math
+import threading
+from collections import defaultdict, deque
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers (0.0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+class LatencyStats:
+    """Per-key request counts plus the latencies of the most recent `window` requests."""
+
+    def __init__(self, window=1000):
+        self.window = window
+        self._lock = threading.Lock()
+        self._counts = defaultdict(int)
+        self._latencies = defaultdict(lambda: deque(maxlen=self.window))
+
+    def record(self, key, latency_ms):
+        with self._lock:
+            self._counts[key] += 1
+            self._latencies[key].append(latency_ms)
+            self._latencies['_all'].append(latency_ms)
+
+    def count(self, key):
+        with self._lock:
+            return self._counts.get(key, 0)
+
+    def snapshot(self):
+        """{key: {count, p50_ms, p95_ms}} plus an 'all' entry across keys."""
+        with self._lock:
+            keys = list(self._counts)
+            latencies = {key: list(values) for key, values in self._latencies.items()}
+            counts = dict(self._counts)
+
+        result = {}
+        for key in keys:
+            result[key] = {
+                'count': counts[key],
+                'p50_ms': round(percentile(latencies.get(key, []), 50), 2),
+                'p95_ms': round(percentile(latencies.get(key, []), 95), 2)
+            }
+        result['all'] = {
+            'count': sum(counts.values()),
+            'p50_ms': round(percentile(latencies.get('_all', []), 50), 2),
+            'p95_ms': round(percentile(latencies.get('_all', []), 95), 2)
+        }
+        return result
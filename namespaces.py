@@ -0,0 +1,227 @@
+# namespaces.py - Per-community configuration and lazily loaded tenants
+import json
+import os
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+from answer_cache import AnswerCache
+from knowledge_store import KnowledgeStore
+
+load_dotenv()
+
+NAMESPACES_CONFIG = os.getenv("NAMESPACES_CONFIG", "namespaces.json")
+DEFAULT_NAMESPACE = os.getenv("DEFAULT_NAMESPACE", "foss-cit")
+MAX_LOADED_NAMESPACES = int(os.getenv("MAX_LOADED_NAMESPACES", "8"))  # Warm tenants kept in memory
+KNOWLEDGE_BASE_PATH = os.getenv("KNOWLEDGE_BASE_PATH")  # Overrides the default namespace's knowledge base
+
+FOSS_CIT_SYSTEM_PROMPT = """You are the FOSS-CIT AI Assistant, a helpful chatbot for the Free and Open Source Software Community (FOSS-CIT) at Coimbatore Institute of Technology.
+
+IMPORTANT: You are the FOSS-CIT chatbot, NOT Coimbatore Institute of Technology itself. Always refer to FOSS-CIT as a community/organization, not as the institute.
+
+Your capabilities:
+- Answer questions about FOSS-CIT community, open source software, and programming
+- Provide career advice and guidance in technology
+- Help with programming concepts and learning paths
+- Share information about FOSS community activities and projects
+
+Key Information about FOSS-CIT:
+- FOSS-CIT was founded by Dhileepan Thangamanimaran, Sai Adarsh, and Sibi Bose
+- FOSS-CIT is a community that promotes open source development and programming education
+- Located at Coimbatore Institute of Technology (CIT), but FOSS-CIT is the community organization
+- Focus on building a community of developers contributing to open source
+
+Tone: Professional, helpful, encouraging, and technically accurate.
+
+When answering, use phrases like "FOSS-CIT community", "our community", or "the FOSS-CIT organization" - not "we at Coimbatore Institute of Technology"."""
+
+GENERIC_SYSTEM_PROMPT = """You are the {display_name} AI Assistant, a helpful chatbot for {description}.
+
+Answer questions about {display_name}, its activities and members, open source software, and programming, using the relevant information provided when available.
+
+Tone: Professional, helpful, encouraging, and technically accurate.
+
+Refer to the organization as "{display_name}" or "our community"."""
+
+# Built-in configuration, used when no namespaces.json exists
+DEFAULT_NAMESPACES = {
+    "foss-cit": {
+        "display_name": "FOSS-CIT",
+        "description": "the Free and Open Source Software Community (FOSS-CIT) at Coimbatore Institute of Technology",
+        "knowledge_base": "complete_knowledge_base.json",
+        "pinecone_index": "foss-cit-knowledge",
+        "pinecone_namespace": "",
+        "system_prompt": FOSS_CIT_SYSTEM_PROMPT,
+        "pdf_files": [
+            ["data/About FOSS-CIT.pdf", "about_foss-cit"],
+            ["data/FOSS-CIT SOP.pdf", "foss-cit_sop"]
+        ],
+        "website_url": "https://fosscit.netlify.app",
+        "manual_knowledge": [
+            {
+                "id": "foss_founders_1",
+                "text": "FOSS-CIT was founded by Dhileepan Thangamanimaran, Sai Adarsh, and Sibi Bose. These three individuals initiated the Free and Open Source Software Community at Chennai Institute of Technology.",
+                "source": "manual_entry",
+                "chunk_number": 1,
+                "chunk_size": 150
+            },
+            {
+                "id": "foss_mission_1",
+                "text": "FOSS-CIT aims to promote open source software development, provide programming education, and build a community of developers interested in contributing to open source projects.",
+                "source": "manual_entry",
+                "chunk_number": 2,
+                "chunk_size": 140
+            }
+        ]
+    }
+}
+
+
+class NamespaceConfig:
+    """Everything that differs between communities: data sources, index and prompt."""
+
+    def __init__(self, name, settings):
+        self.name = name
+        self.display_name = settings.get("display_name", name)
+        self.description = settings.get("description", self.display_name)
+        self.knowledge_base = settings.get("knowledge_base", f"knowledge_bases/{name}.json")
+        self.pinecone_index = settings.get("pinecone_index", "community-knowledge")
+        # Pinecone namespace inside the index; several communities can share one index
+        self.pinecone_namespace = settings.get("pinecone_namespace", name)
+        self.pdf_files = [tuple(item) for item in settings.get("pdf_files", [])]
+        self.website_url = settings.get("website_url")
+        self.manual_knowledge = settings.get("manual_knowledge", [])
+        self.system_prompt = settings.get("system_prompt") or GENERIC_SYSTEM_PROMPT.format(
+            display_name=self.display_name, description=self.description
+        )
+
+
+def load_namespace_configs(path=NAMESPACES_CONFIG):
+    """Read namespaces.json ({name: settings}); fall back to the built-in FOSS-CIT namespace.
+
+    Settings for a built-in namespace are merged over its defaults, so "foss-cit"
+    keeps its prompt and manual knowledge unless the file overrides them.
+    KNOWLEDGE_BASE_PATH, if set, replaces the default namespace's knowledge base.
+    """
+    settings = DEFAULT_NAMESPACES
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            settings = json.load(f)
+        print(f"🏘️ Loaded {len(settings)} namespaces from {path}")
+    configs = {name: NamespaceConfig(name, {**DEFAULT_NAMESPACES.get(name, {}), **values})
+               for name, values in settings.items()}
+    if KNOWLEDGE_BASE_PATH and DEFAULT_NAMESPACE in configs:
+        configs[DEFAULT_NAMESPACE].knowledge_base = KNOWLEDGE_BASE_PATH
+    return configs
+
+
+class Tenant:
+    """A loaded namespace: its knowledge base snapshot store, answer cache and Pinecone handle.
+
+    `pinned_answers` maps normalized questions to precomputed hot answers. They
+    are checked before the answer cache and never expire, but are dropped with
+    the cache when a new knowledge base is swapped in.
+    """
+
+    def __init__(self, config, build_indexes, open_pinecone_index=None):
+        self.config = config
+        self.answer_cache = AnswerCache()
+        self.pinned_answers = {}
+        self.kb_store = KnowledgeStore(config.knowledge_base, build_indexes, on_swap=self._on_swap)
+        self.pinecone_index = open_pinecone_index(config) if open_pinecone_index else None
+
+    @property
+    def name(self):
+        return self.config.name
+
+    def _on_swap(self, snapshot):
+        self.pinned_answers = {}
+        self.answer_cache.clear()
+
+
+class NamespaceRegistry:
+    """Loads tenants on first use and evicts the least recently used cold ones.
+
+    Shared resources (embedding model, LLM client, admission control) live outside
+    the registry, so a tenant only costs its knowledge base, indexes and cache.
+    The default namespace is never evicted. An evicted tenant's memory is freed
+    once in-flight requests that still hold it finish. `on_load(tenant)` runs after
+    a tenant's knowledge base is loaded (e.g. to pre-fill its answer cache).
+    """
+
+    def __init__(self, configs, build_indexes, open_pinecone_index=None,
+                 max_loaded=MAX_LOADED_NAMESPACES, default=DEFAULT_NAMESPACE, watch_interval=0,
+                 on_load=None):
+        self.configs = configs
+        self.build_indexes = build_indexes
+        self.open_pinecone_index = open_pinecone_index
+        self.max_loaded = max(max_loaded, 1)
+        self.default = default if default in configs else next(iter(configs))
+        self.watch_interval = watch_interval
+        self.on_load = on_load
+        self._tenants = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {name: threading.Lock() for name in configs}
+        self.loads = 0
+        self.evictions = 0
+
+    def __contains__(self, name):
+        return name in self.configs
+
+    def get(self, name=None):
+        """Return the tenant for `name` (default namespace if None), loading it if cold.
+
+        Raises KeyError for unknown namespaces.
+        """
+        name = name or self.default
+        if name not in self.configs:
+            raise KeyError(name)
+
+        with self._lock:
+            tenant = self._tenants.get(name)
+            if tenant is not None:
+                self._tenants.move_to_end(name)
+                return tenant
+
+        # Load outside the registry lock so warm namespaces keep serving
+        with self._load_locks[name]:
+            with self._lock:
+                tenant = self._tenants.get(name)
+            if tenant is None:
+                print(f"🏘️ Loading namespace '{name}'...")
+                tenant = Tenant(self.configs[name], self.build_indexes, self.open_pinecone_index)
+                tenant.kb_store.reload()
+                tenant.kb_store.start_watcher(self.watch_interval)
+                if self.on_load:
+                    self.on_load(tenant)
+                with self._lock:
+                    self._tenants[name] = tenant
+                    self.loads += 1
+                    self._evict()
+        return tenant
+
+    def _evict(self):
+        """Drop least recently used tenants beyond max_loaded (caller holds the lock)."""
+        for name in list(self._tenants):
+            if len(self._tenants) <= self.max_loaded:
+                break
+            if name == self.default:
+                continue
+            tenant = self._tenants.pop(name)
+            tenant.kb_store.stop_watcher()
+            self.evictions += 1
+            print(f"💤 Evicted cold namespace '{name}'")
+
+    def loaded(self):
+        with self._lock:
+            return list(self._tenants.values())
+
+    def stats(self):
+        with self._lock:
+            return {
+                "configured": len(self.configs),
+                "loaded": list(self._tenants),
+                "max_loaded": self.max_loaded,
+                "default": self.default,
+                "loads": self.loads,
+                "evictions": self.evictions
+            }
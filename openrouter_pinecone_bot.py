@@ -1,13 +1,25 @@
 # openrouter_pinecone_bot.py - Enhanced Bot with OpenRouter + Sentence Transformers
 import os
 import json
-from flask import Flask, request, jsonify, send_from_directory
+import itertools
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+from flask import Flask, request, jsonify, send_from_directory, Response
 from flask_cors import CORS
 from dotenv import load_dotenv
 from openai import OpenAI
 from pinecone import Pinecone
-from sentence_transformers import SentenceTransformer
+from embedding_backend import load_embedding_backend
 import time
+import reranker
+from admin import is_admin_request
+from vector_index import VectorIndex
+from admission import RateLimiter, AdmissionController, client_id
+from namespaces import NamespaceRegistry, load_namespace_configs, FOSS_CIT_SYSTEM_PROMPT
+from answer_cache import normalize_question
+from query_log import QueryLog
+from hot_questions import HOT_ANSWERS_PATH, load_hot_answers
+from profiling import RequestProfiler
 
 # Load environment variables
 load_dotenv()
@@ -15,9 +27,21 @@ load_dotenv()
 # Configuration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
-PINECONE_INDEX_NAME = "foss-cit-knowledge"
 CHAT_MODEL = os.getenv("OPENAI_CHAT_MODEL", "gpt-3.5-turbo")
 
+# Batch answering configuration
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))  # Parallel LLM calls
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "32"))
+BATCH_EMBED_SIZE = int(os.getenv("BATCH_EMBED_SIZE", "64"))  # Questions per encode() call
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+
+# Knowledge base hot reload
+KB_WATCH_INTERVAL = float(os.getenv("KB_WATCH_INTERVAL", "0"))  # Seconds; 0 disables the watcher
+
+# Local vector index storage: float32, float16 or int8 (per-vector scales)
+LOCAL_INDEX_DTYPE = os.getenv("LOCAL_INDEX_DTYPE", "float32")
+LOCAL_INDEX_RESCORE = int(os.getenv("LOCAL_INDEX_RESCORE", "0"))  # int8 candidates re-scored from a float16 copy
+
 print("🚀 FOSS-CIT Enhanced Bot with OpenRouter + Local Embeddings")
 print("=" * 60)
 
@@ -30,38 +54,59 @@ client = OpenAI(
 
 # Initialize local embedding model
 print("📦 Loading local embedding model...")
-embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+embedding_model = load_embedding_backend()
 print("✅ Local embedding model loaded!")
 
-# Initialize Pinecone
+# Optional cross-encoder re-ranking stage
+if reranker.RERANK_ENABLED:
+    reranker.warm_up()
+
+# Initialize Pinecone (one client; each namespace opens its own index handle)
 try:
     pc = Pinecone(api_key=PINECONE_API_KEY)
-    pinecone_index = pc.Index(PINECONE_INDEX_NAME)
-    print(f"✅ Connected to Pinecone index: {PINECONE_INDEX_NAME}")
+    print("✅ Connected to Pinecone")
     PINECONE_AVAILABLE = True
 except Exception as e:
     print(f"⚠️ Pinecone connection failed: {e}")
     print("📝 Falling back to local knowledge base")
     PINECONE_AVAILABLE = False
-    pinecone_index = None
+    pc = None
+
+def open_pinecone_index(config):
+    """Open a namespace's Pinecone index, or None if Pinecone is unavailable."""
+    if not PINECONE_AVAILABLE:
+        return None
+    try:
+        index = pc.Index(config.pinecone_index)
+        print(f"✅ Connected to Pinecone index: {config.pinecone_index} ({config.pinecone_namespace or 'default namespace'})")
+        return index
+    except Exception as e:
+        print(f"⚠️ Pinecone index {config.pinecone_index} unavailable: {e}")
+        return None
 
 # Flask app setup
 app = Flask(__name__)
 CORS(app)
 
-# Load local knowledge base as fallback
-knowledge_base = []
-try:
-    with open('complete_knowledge_base.json', 'r', encoding='utf-8') as f:
-        knowledge_base = json.load(f)
-        print(f"📚 Loaded comprehensive knowledge base with {len(knowledge_base)} chunks")
-except FileNotFoundError:
-    print("⚠️ No local knowledge base found. Run training script first.")
-except Exception as e:
-    print(f"❌ Error loading knowledge base: {e}")
+# Opt-in profiling of /chat requests (PROFILING_ENABLED or an admin X-Profile header)
+profiler = RequestProfiler({'chat'})
+profiler.install(app)
+
+# Load protection: per-client token buckets and a global cap on LLM calls,
+# shared by all namespaces
+rate_limiter = RateLimiter()
+llm_admission = AdmissionController()
+
+# Every answered question is appended to a JSONL log by a background thread
+query_log = QueryLog()
+
+AI_ERROR_RESPONSE = "I apologize, but I'm having trouble generating a response right now. Please try again."
 
 def get_embedding(text):
     """Get embedding using local Sentence Transformer model."""
+    precomputed = hot_embeddings.get(text.strip())
+    if precomputed is not None:
+        return precomputed
     try:
         # Use local model - no API calls needed!
         embedding = embedding_model.encode(text).tolist()
@@ -70,27 +115,141 @@ def get_embedding(text):
         print(f"❌ Error getting embedding: {e}")
         return None
 
-def search_pinecone(query, top_k=3):
+def get_embeddings(texts):
+    """Embed many texts at once; returns a float32 array of shape (len(texts), dim)."""
+    try:
+        return embedding_model.encode(
+            texts,
+            batch_size=BATCH_EMBED_SIZE,
+            normalize_embeddings=True
+        ).astype(np.float32)
+    except Exception as e:
+        print(f"❌ Error getting batch embeddings: {e}")
+        return None
+
+def build_local_indexes(chunks):
+    """Build the per-snapshot local indexes (runs at load/reload, off the request path)."""
+    vector_index = None
+    if chunks:
+        print(f"📐 Embedding {len(chunks)} local chunks for vector search ({LOCAL_INDEX_DTYPE})...")
+        vectors = get_embeddings([chunk['text'] for chunk in chunks])
+        if vectors is not None:
+            vector_index = VectorIndex(vectors, LOCAL_INDEX_DTYPE,
+                                       keep_rescore_copy=LOCAL_INDEX_RESCORE > 0)
+    return {'vectors': vector_index}
+
+# Answers and query embeddings precomputed by hot_questions.py for the most asked
+# questions, read once here so requests never touch the file
+hot_answers = {}
+hot_knowledge_bases = {}
+hot_embeddings = {}
+
+def load_hot_questions(path=HOT_ANSWERS_PATH):
+    """(Re)load hot_answers.json; returns {namespace: entries}.
+
+    Stored embeddings are only used if the same model and backend produced them,
+    and only for the exact question text they were computed for.
+    """
+    global hot_answers, hot_knowledge_bases, hot_embeddings
+    data = load_hot_answers(path)
+    answers = data.get('namespaces', {})
+    embeddings = {}
+    embedding_source = data.get('embedding') or {}
+    if embedding_source.get('model') == embedding_model.model_name and \
+            embedding_source.get('backend') == embedding_model.name:
+        for entries in answers.values():
+            for entry in entries:
+                if entry.get('embedding'):
+                    embeddings[entry['question'].strip()] = entry['embedding']
+    elif answers:
+        print(f"⚠️ Hot answer embeddings come from {embedding_source.get('model')} "
+              f"({embedding_source.get('backend')}), not {embedding_model.model_name} "
+              f"({embedding_model.name}); ignoring them")
+    hot_answers, hot_knowledge_bases, hot_embeddings = answers, data.get('knowledge_bases', {}), embeddings
+    return answers
+
+def seed_hot_answers(tenant):
+    """Pin a namespace's precomputed hot answers, replacing any pinned before.
+
+    Pinned answers bypass the answer cache's LRU and TTL, so they are only pinned
+    when the loaded knowledge base is the one they were computed from. After a
+    reload to other data they are dropped and left to be regenerated.
+    """
+    entries = hot_answers.get(tenant.name, [])
+    if entries and hot_knowledge_bases.get(tenant.name) != tenant.kb_store.current().content_hash:
+        print(f"⚠️ Hot answers for '{tenant.name}' were computed from another knowledge base; not pinning them")
+        entries = []
+    tenant.pinned_answers = {normalize_question(entry['question']): entry['answer'] for entry in entries}
+    return len(tenant.pinned_answers)
+
+load_hot_questions()
+
+# Communities served by this process. Each namespace has its own knowledge base
+# snapshot, indexes, Pinecone namespace, prompt and answer cache, loaded on first
+# use; the embedding model and LLM client above are shared.
+namespaces = NamespaceRegistry(load_namespace_configs(), build_local_indexes,
+                               open_pinecone_index, watch_interval=KB_WATCH_INTERVAL,
+                               on_load=seed_hot_answers)
+namespaces.get()  # Warm the default namespace at startup
+
+def search_local_vectors_batch(query_embeddings, top_k=3, snapshot=None):
+    """Score every query against every local chunk with a single matrix product.
+
+    Returns None when the snapshot has no vector index (the embedding model failed
+    at load time); callers then fall back to keyword matching.
+    """
+    if snapshot is None:
+        snapshot = namespaces.get().kb_store.current()
+    knowledge_base = snapshot.chunks
+    vector_index = snapshot.indexes.get('vectors')
+    if vector_index is None or query_embeddings is None:
+        return None
+    if not len(query_embeddings):
+        return []
+
+    queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+    queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+    top_scores, top_idx = vector_index.search(queries, top_k=top_k, rescore=LOCAL_INDEX_RESCORE)
+
+    results = []
+    for scores, idx in zip(top_scores, top_idx):
+        results.append([
+            {
+                'text': knowledge_base[i]['text'],
+                'source': knowledge_base[i].get('source', 'local'),
+                'score': float(score)
+            }
+            for score, i in zip(scores, idx) if score > 0.3
+        ])
+    return results
+
+def search_pinecone(query, top_k=3, query_embedding=None, min_score=0.6, tenant=None):
     """Search Pinecone for relevant chunks."""
-    if not PINECONE_AVAILABLE or not pinecone_index:
+    tenant = tenant or namespaces.get()
+    pinecone_index = tenant.pinecone_index
+    if pinecone_index is None:
         return []
-    
+
     try:
-        # Get query embedding using local model
-        query_embedding = get_embedding(query)
-        if not query_embedding:
+        # Get query embedding using local model (unless the caller already has one)
+        if query_embedding is None:
+            query_embedding = get_embedding(query)
+        if query_embedding is None:
             return []
+        if isinstance(query_embedding, np.ndarray):
+            query_embedding = query_embedding.tolist()
         
         # Search Pinecone
         results = pinecone_index.query(
             vector=query_embedding,
             top_k=top_k,
-            include_metadata=True
+            include_metadata=True,
+            namespace=tenant.config.pinecone_namespace
         )
         
         relevant_chunks = []
         for match in results.matches:
-            if match.score > 0.6:  # Similarity threshold
+            if match.score > min_score:  # Similarity threshold
                 relevant_chunks.append({
                     'text': match.metadata.get('text', ''),
                     'source': match.metadata.get('source', 'unknown'),
@@ -104,10 +263,26 @@ def search_pinecone(query, top_k=3):
         print(f"❌ Pinecone search error: {e}")
         return []
 
-def search_local_knowledge(query, top_k=3):
-    """Search local knowledge base for relevant information."""
+def search_local_knowledge(query, top_k=3, snapshot=None, query_embedding=None):
+    """Search local knowledge base for relevant information.
+
+    Uses the snapshot's vector index (the same search answer_batch runs for a
+    whole batch at once), and keyword matching only when there is no index.
+    """
+    if snapshot is None:
+        snapshot = namespaces.get().kb_store.current()
+    knowledge_base = snapshot.chunks
     if not knowledge_base:
         return []
+
+    if query_embedding is None and snapshot.indexes.get('vectors') is not None:
+        query_embedding = get_embedding(query)
+    vector_results = search_local_vectors_batch(
+        None if query_embedding is None else [query_embedding], top_k=top_k, snapshot=snapshot
+    )
+    if vector_results is not None:
+        print(f"📚 Local search found {len(vector_results[0])} relevant chunks")
+        return vector_results[0]
     
     query_lower = query.lower()
     relevant_chunks = []
@@ -135,8 +310,8 @@ def search_local_knowledge(query, top_k=3):
     print(f"📚 Local search found {len(relevant_chunks[:top_k])} relevant chunks")
     return relevant_chunks[:top_k]
 
-def get_ai_response(user_message, context_chunks):
-    """Generate AI response using OpenRouter with context."""
+def get_ai_response(user_message, context_chunks, system_prompt=FOSS_CIT_SYSTEM_PROMPT):
+    """Generate AI response using OpenRouter with context and the namespace's prompt."""
     try:
         # Build context from relevant chunks
         context = ""
@@ -146,28 +321,7 @@ def get_ai_response(user_message, context_chunks):
                 context += f"{i}. {chunk['text']}\n"
             context += "\n"
         
-        # Enhanced system prompt
-        system_prompt = f"""You are the FOSS-CIT AI Assistant, a helpful chatbot for the Free and Open Source Software Community (FOSS-CIT) at Coimbatore Institute of Technology.
-
-IMPORTANT: You are the FOSS-CIT chatbot, NOT Coimbatore Institute of Technology itself. Always refer to FOSS-CIT as a community/organization, not as the institute.
-
-Your capabilities:
-- Answer questions about FOSS-CIT community, open source software, and programming
-- Provide career advice and guidance in technology
-- Help with programming concepts and learning paths
-- Share information about FOSS community activities and projects
-
-Key Information about FOSS-CIT:
-- FOSS-CIT was founded by Dhileepan Thangamanimaran, Sai Adarsh, and Sibi Bose
-- FOSS-CIT is a community that promotes open source development and programming education
-- Located at Coimbatore Institute of Technology (CIT), but FOSS-CIT is the community organization
-- Focus on building a community of developers contributing to open source
-
-Tone: Professional, helpful, encouraging, and technically accurate.
-
-When answering, use phrases like "FOSS-CIT community", "our community", or "the FOSS-CIT organization" - not "we at Coimbatore Institute of Technology".
-
-{context}"""
+        system_prompt = f"{system_prompt}\n\n{context}"
 
         # Generate response
         response = client.chat.completions.create(
@@ -184,7 +338,248 @@ When answering, use phrases like "FOSS-CIT community", "our community", or "the
         
     except Exception as e:
         print(f"❌ Error getting AI response: {e}")
-        return "I apologize, but I'm having trouble generating a response right now. Please try again."
+        return AI_ERROR_RESPONSE
+
+def retrieve_context(user_message, query_embedding=None, local_chunks=None, snapshot=None, tenant=None):
+    """Find up to 3 unique context chunks: Pinecone first, then local fallback.
+
+    With re-ranking enabled, a wider candidate pool is fetched and the cross-encoder
+    keeps the best RERANK_KEEP chunks. If re-ranking times out or fails, the
+    context is selected exactly as with re-ranking off, so loosely matching
+    candidates never reach the prompt unscored.
+    """
+    tenant = tenant or namespaces.get()
+    if snapshot is None:
+        snapshot = tenant.kb_store.current()
+    if query_embedding is None:
+        query_embedding = get_embedding(user_message)  # Shared by Pinecone and the local index
+    if reranker.RERANK_ENABLED:
+        top_k, min_score = reranker.RERANK_TOP_N, reranker.RERANK_CANDIDATE_MIN_SCORE
+    else:
+        top_k, min_score = 3, 0.6
+    
+    # Try Pinecone first
+    pinecone_chunks = []
+    if tenant.pinecone_index is not None:
+        pinecone_chunks = search_pinecone(user_message, top_k=top_k, query_embedding=query_embedding,
+                                          min_score=min_score, tenant=tenant)
+    
+    def select(min_score, limit):
+        """Pinecone chunks above min_score, with the local fallback if there are fewer than 2."""
+        nonlocal local_chunks
+        relevant_chunks = [chunk for chunk in pinecone_chunks if chunk['score'] > min_score][:limit]
+        if len(relevant_chunks) < 2:
+            if not local_chunks:
+                local_chunks = search_local_knowledge(user_message, top_k=top_k, snapshot=snapshot,
+                                                      query_embedding=query_embedding)
+            relevant_chunks.extend(local_chunks[:limit])
+        
+        # Remove duplicates
+        seen_texts = set()
+        unique_chunks = []
+        for chunk in relevant_chunks:
+            if chunk['text'] not in seen_texts:
+                unique_chunks.append(chunk)
+                seen_texts.add(chunk['text'])
+        return unique_chunks
+    
+    if reranker.RERANK_ENABLED:
+        return reranker.rerank(user_message, select(min_score, top_k), top_k=reranker.RERANK_KEEP,
+                               fallback=lambda: select(0.6, 3)[:3])
+    return select(min_score, top_k)[:3]
+
+def get_degraded_response(context_chunks):
+    """Fast answer for shed requests: the best local chunk instead of an LLM call."""
+    if not context_chunks:
+        return "I'm handling a lot of questions right now. Please try again in a moment."
+    text = context_chunks[0]['text']
+    if len(text) > 400:
+        text = text[:400].rsplit(' ', 1)[0] + "..."
+    return f"I'm handling a lot of questions right now, so here is the most relevant information I found:\n\n{text}"
+
+def answer_question(user_message, query_embedding=None, local_chunks=None, snapshot=None,
+                    block=False, tenant=None, origin='chat', admission=None):
+    """Retrieve context and generate an answer, with per-stage timings in ms.
+
+    Answers come from the namespace's cache when possible. LLM calls go through
+    `admission` (default: the global controller); when it sheds the request, a degraded answer
+    built from the retrieved chunks is returned instead. block=True (batch work)
+    waits for an LLM slot rather than being shed. Every answer is recorded in the
+    query log, tagged with `origin` ('chat' or 'batch').
+    """
+    tenant = tenant or namespaces.get()
+    admission = admission or llm_admission
+    if snapshot is None:
+        snapshot = tenant.kb_store.current()
+    start = time.perf_counter()
+    
+    cached = tenant.pinned_answers.get(normalize_question(user_message))
+    cache_status = 'pinned'
+    if cached is None:
+        cached, cache_status = tenant.answer_cache.get(user_message, snapshot.version), 'hit'
+    if cached is not None:
+        latency_ms = round((time.perf_counter() - start) * 1000, 2)
+        query_log.log({
+            'question': user_message, 'namespace': tenant.name, 'origin': origin,
+            'path': 'cache', 'cache': cache_status, 'hits': [], 'latency_ms': latency_ms
+        })
+        return dict(cached, cache=cache_status, degraded=False, timings_ms={'cache': latency_ms})
+    
+    unique_chunks = retrieve_context(user_message, query_embedding, local_chunks, snapshot, tenant)
+    retrieved = time.perf_counter()
+    
+    # Generate AI response if an LLM slot is available
+    with admission.slot(block=block) as admitted:
+        admitted_at = time.perf_counter()
+        if admitted:
+            response = get_ai_response(user_message, unique_chunks, tenant.config.system_prompt)
+        else:
+            print("🚦 LLM queue full, answering from local index")
+            response = get_degraded_response(unique_chunks)
+    done = time.perf_counter()
+    
+    result = {
+        'response': response,
+        'sources_used': len(unique_chunks),
+        'search_method': 'pinecone' if tenant.pinecone_index is not None else 'local'
+    }
+    if admitted and response != AI_ERROR_RESPONSE:
+        # Tagged with the snapshot it was built from: if a reload finished meanwhile,
+        # the entry is a miss for requests on the new knowledge base
+        tenant.answer_cache.put(user_message, result, snapshot.version)
+    
+    query_log.log({
+        'question': user_message, 'namespace': tenant.name, 'origin': origin,
+        'path': ('llm_error' if response == AI_ERROR_RESPONSE else 'llm') if admitted else 'degraded',
+        'cache': 'miss',
+        'search_method': result['search_method'],
+        'hits': [{'source': chunk.get('source'), 'score': round(float(chunk.get('score', 0)), 4)}
+                 for chunk in unique_chunks],
+        'latency_ms': round((done - start) * 1000, 2)
+    })
+    
+    return dict(result, cache='miss', degraded=not admitted, timings_ms={
+        'retrieve': round((retrieved - start) * 1000, 2),
+        'llm_queue': round((admitted_at - retrieved) * 1000, 2),
+        'llm': round((done - admitted_at) * 1000, 2)
+    })
+
+def parse_jsonl_questions(lines):
+    """Parse JSONL lines into [{'id', 'message'}]; lines may be objects or bare strings."""
+    questions = []
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON on line {line_number}: {e}")
+        
+        if isinstance(item, str):
+            item = {'message': item}
+        if not isinstance(item, dict):
+            raise ValueError(f"Line {line_number} must be a JSON object or string")
+        
+        message = str(item.get('message') or item.get('question') or '').strip()
+        if not message:
+            raise ValueError(f"Line {line_number} has no 'message'")
+        questions.append({'id': item.get('id', len(questions)), 'message': message})
+    return questions
+
+def clamp_batch_concurrency(concurrency):
+    """Worker threads for a batch: the requested concurrency within 1..BATCH_MAX_CONCURRENCY."""
+    return max(1, min(int(concurrency), BATCH_MAX_CONCURRENCY))
+
+def offline_admission(concurrency):
+    """Admission control for offline batch runs (batch_chat.py, hot_questions.py).
+
+    Nothing interactive shares the process, so no slots are held back and the
+    LLM calls scale with `concurrency` instead of LLM_BATCH_MAX_CONCURRENCY.
+    """
+    concurrency = clamp_batch_concurrency(concurrency)
+    return AdmissionController(max_concurrency=concurrency, max_batch_concurrency=concurrency,
+                               interactive_reserve=0)
+
+def answer_batch(questions, concurrency=BATCH_CONCURRENCY, tenant=None, admission=None):
+    """Answer many questions for one namespace, yielding results as they complete.
+
+    Questions are embedded in batches and scored against the local knowledge base
+    with one matrix product (the same vector search /chat uses, so each item gets
+    the context a live request would); Pinecone lookups and LLM calls then run on
+    a pool of `concurrency` worker threads. LLM calls go through `admission`
+    (default: the server's controller, which caps batch work at its share).
+    """
+    concurrency = clamp_batch_concurrency(concurrency)
+    tenant = tenant or namespaces.get()
+    snapshot = tenant.kb_store.current()  # One knowledge base version for the whole batch
+    messages = [q['message'] for q in questions]
+    
+    # Stage 1: batched embedding
+    start = time.perf_counter()
+    embeddings = get_embeddings(messages) if messages else None
+    embedded = time.perf_counter()
+    
+    # Stage 2: vectorized local retrieval for the whole batch
+    local_top_k = reranker.RERANK_TOP_N if reranker.RERANK_ENABLED else 3
+    local_results = search_local_vectors_batch(embeddings, top_k=local_top_k, snapshot=snapshot)
+    if local_results is None:
+        local_results = [None] * len(messages)  # No vector index: keyword search per item
+    searched = time.perf_counter()
+    
+    # Batch stages are shared, so each item is charged its amortized share
+    embed_ms = (embedded - start) * 1000 / max(len(messages), 1)
+    local_ms = (searched - embedded) * 1000 / max(len(messages), 1)
+    
+    def run(index, question):
+        item_start = time.perf_counter()
+        result = {'id': question['id'], 'index': index, 'message': question['message']}
+        try:
+            query_embedding = embeddings[index] if embeddings is not None else None
+            result.update(answer_question(question['message'], query_embedding,
+                                          local_results[index], snapshot, block=True, tenant=tenant,
+                                          origin='batch', admission=admission))
+        except Exception as e:
+            print(f"❌ Batch item {question['id']} failed: {e}")
+            result['error'] = str(e)
+            result['timings_ms'] = {}
+        result['timings_ms']['embed'] = round(embed_ms, 2)
+        result['timings_ms']['local_search'] = round(local_ms, 2)
+        result['timings_ms']['queue_wait'] = round((item_start - searched) * 1000, 2)
+        result['timings_ms']['total'] = round((time.perf_counter() - start) * 1000, 2)
+        return result
+    
+    # Submit lazily, keeping at most `concurrency` items in flight, so a consumer
+    # that stops early (client disconnect) leaves no queued LLM calls behind
+    pending = iter(enumerate(questions))
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        in_flight = {executor.submit(run, i, q) for i, q in itertools.islice(pending, concurrency)}
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                next_item = next(pending, None)
+                if next_item is not None:
+                    in_flight.add(executor.submit(run, *next_item))
+                yield future.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def resolve_tenant(namespace=None):
+    """Tenant for a path/body namespace (default if None), or a 404 response."""
+    try:
+        return namespaces.get(namespace), None
+    except KeyError:
+        return None, (jsonify({'error': f'Unknown namespace: {namespace}'}), 404)
+
+def check_rate_limit():
+    """Return a 429 response if the calling client is over its rate limit, else None."""
+    allowed, retry_after = rate_limiter.check(client_id(request))
+    if allowed:
+        return None
+    response = jsonify({'error': 'Rate limit exceeded', 'retry_after': round(retry_after, 2)})
+    response.headers['Retry-After'] = str(max(int(retry_after + 0.999), 1))
+    return response, 429
 
 @app.route('/')
 def home():
@@ -212,15 +607,24 @@ def health():
     status = {
         "status": "healthy",
         "openrouter": "connected" if OPENAI_API_KEY else "missing_key",
-        "pinecone": "connected" if PINECONE_AVAILABLE else "disconnected",
-        "knowledge_base": f"{len(knowledge_base)} chunks loaded",
-        "embedding_model": "sentence-transformers (local)"
+        "pinecone": "connected" if namespaces.get().pinecone_index is not None else "disconnected",
+        "knowledge_base": f"{len(namespaces.get().kb_store.current())} chunks loaded",
+        "knowledge_version": namespaces.get().kb_store.current().version,
+        "namespaces": namespaces.stats(),
+        "local_index": LOCAL_INDEX_DTYPE,
+        "embedding_model": f"{embedding_model.name} (local)",
+        "reranker": reranker.stats()
     }
     return jsonify(status)
 
 @app.route('/chat', methods=['POST'])
-def chat():
-    """Main chat endpoint."""
+@app.route('/ns/<namespace>/chat', methods=['POST'])
+def chat(namespace=None):
+    """Main chat endpoint. The namespace comes from the path or the JSON body."""
+    limited = check_rate_limit()
+    if limited:
+        return limited
+    
     try:
         # Check if request has JSON data
         if not request.is_json:
@@ -235,45 +639,179 @@ def chat():
         if not user_message:
             return jsonify({'error': 'No message provided'}), 400
         
-        print(f"💬 User: {user_message}")
-        
-        # Search for relevant context
-        relevant_chunks = []
-        
-        # Try Pinecone first
-        if PINECONE_AVAILABLE:
-            relevant_chunks = search_pinecone(user_message)
+        tenant, error = resolve_tenant(namespace or data.get('namespace'))
+        if error:
+            return error
         
-        # Fallback to local search if Pinecone didn't find enough
-        if len(relevant_chunks) < 2:
-            local_chunks = search_local_knowledge(user_message)
-            relevant_chunks.extend(local_chunks)
-        
-        # Remove duplicates and limit
-        seen_texts = set()
-        unique_chunks = []
-        for chunk in relevant_chunks:
-            if chunk['text'] not in seen_texts:
-                unique_chunks.append(chunk)
-                seen_texts.add(chunk['text'])
-                if len(unique_chunks) >= 3:
-                    break
+        print(f"💬 User [{tenant.name}]: {user_message}")
         
-        # Generate AI response
-        response = get_ai_response(user_message, unique_chunks)
+        result = answer_question(user_message, tenant=tenant)
         
-        print(f"🤖 Assistant: {response[:100]}...")
+        print(f"🤖 Assistant: {result['response'][:100]}...")
         
         return jsonify({
-            'response': response,
-            'sources_used': len(unique_chunks),
-            'search_method': 'pinecone' if PINECONE_AVAILABLE else 'local'
+            'response': result['response'],
+            'sources_used': result['sources_used'],
+            'search_method': result['search_method'],
+            'degraded': result['degraded'],
+            'namespace': tenant.name
         })
         
     except Exception as e:
         print(f"❌ Chat error: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/chat/batch', methods=['POST'])
+@app.route('/ns/<namespace>/chat/batch', methods=['POST'])
+def chat_batch(namespace=None):
+    """Batch chat endpoint: JSONL questions in, JSONL answers streamed out.
+
+    Admin only: one request can hold up to BATCH_MAX_ITEMS LLM calls, which a
+    per-request rate limit cannot account for. The namespace comes from the
+    path or the ?namespace= query parameter.
+    """
+    if not is_admin_request(request):
+        return jsonify({'error': 'Forbidden'}), 403
+    
+    tenant, error = resolve_tenant(namespace or request.args.get('namespace'))
+    if error:
+        return error
+    
+    try:
+        questions = parse_jsonl_questions(request.get_data(as_text=True).splitlines())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if not questions:
+        return jsonify({'error': 'No questions provided'}), 400
+    if len(questions) > BATCH_MAX_ITEMS:
+        return jsonify({'error': f'Too many questions (max {BATCH_MAX_ITEMS})'}), 400
+
+    try:
+        concurrency = int(request.args.get('concurrency', BATCH_CONCURRENCY))
+    except ValueError:
+        return jsonify({'error': 'concurrency must be an integer'}), 400
+
+    # Workers are capped at BATCH_MAX_CONCURRENCY, LLM calls at the batch share of the server
+    workers = clamp_batch_concurrency(concurrency)
+    llm_concurrency = min(workers, llm_admission.max_batch_concurrency)
+    if llm_concurrency != concurrency:
+        print(f"📦 Batch concurrency {concurrency} clamped to {workers} workers, {llm_concurrency} LLM calls")
+    print(f"📦 Batch [{tenant.name}]: {len(questions)} questions (concurrency {workers})")
+
+    def generate():
+        for result in answer_batch(questions, concurrency=workers, tenant=tenant):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+
+    response = Response(generate(), mimetype='application/x-ndjson')
+    response.headers['X-Batch-Concurrency'] = str(workers)
+    response.headers['X-Batch-LLM-Concurrency'] = str(llm_concurrency)
+    return response
+
+@app.route('/stats')
+def stats():
+    """Rate limiting, admission control and cache statistics for capacity planning."""
+    return jsonify({
+        'rate_limiter': rate_limiter.stats(),
+        'llm_admission': llm_admission.stats(),
+        'answer_cache': {tenant.name: tenant.answer_cache.stats() for tenant in namespaces.loaded()},
+        'namespaces': namespaces.stats(),
+        'query_log': query_log.stats()
+    })
+
+def admin_tenants():
+    """Tenants selected by ?namespace= (default: every loaded namespace), or a 404 response."""
+    namespace = request.args.get('namespace')
+    if not namespace:
+        return namespaces.loaded(), None
+    tenant, error = resolve_tenant(namespace)
+    return ([tenant] if tenant else None), error
+
+@app.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    """Reload knowledge bases in the background (add ?wait=1 to block for the reports).
+
+    Reloads every loaded namespace, or only the one given by ?namespace=.
+    """
+    if not is_admin_request(request):
+        return jsonify({'error': 'Forbidden'}), 403
+    
+    tenants, error = admin_tenants()
+    if error:
+        return error
+    
+    if request.args.get('wait'):
+        return jsonify({tenant.name: tenant.kb_store.reload() for tenant in tenants})
+    
+    return jsonify({
+        tenant.name: {'status': 'started' if tenant.kb_store.reload_async() else 'in_progress'}
+        for tenant in tenants
+    }), 202
+
+@app.route('/admin/knowledge')
+def admin_knowledge():
+    """Current knowledge base snapshot and last reload report per loaded namespace."""
+    if not is_admin_request(request):
+        return jsonify({'error': 'Forbidden'}), 403
+    
+    tenants, error = admin_tenants()
+    if error:
+        return error
+    return jsonify({tenant.name: tenant.kb_store.status() for tenant in tenants})
+
+@app.route('/admin/hot-answers', methods=['POST'])
+def admin_hot_answers():
+    """Load the latest hot_answers.json and pin its answers in loaded namespaces."""
+    if not is_admin_request(request):
+        return jsonify({'error': 'Forbidden'}), 403
+    
+    load_hot_questions()
+    return jsonify({
+        'embeddings': len(hot_embeddings),
+        'seeded': {tenant.name: seed_hot_answers(tenant) for tenant in namespaces.loaded()}
+    })
+
+@app.route('/admin/profiles')
+def admin_profiles():
+    """Profiled requests kept in memory, newest first."""
+    if not is_admin_request(request):
+        return jsonify({'error': 'Forbidden'}), 403
+    return jsonify({'stats': profiler.stats(), 'profiles': profiler.profiles()})
+
+@app.route('/admin/profiles/<int:profile_id>')
+def admin_profile(profile_id):
+    """Download one profile (collapsed stacks or pstats file); ?format=text summarizes cProfile runs."""
+    if not is_admin_request(request):
+        return jsonify({'error': 'Forbidden'}), 403
+    
+    if request.args.get('format') == 'text':
+        summary = profiler.summary(profile_id)
+        if summary is None:
+            return jsonify({'error': 'No cProfile profile with that id'}), 404
+        return Response(summary, mimetype='text/plain')
+    
+    exported = profiler.export(profile_id)
+    if exported is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    filename, mimetype, data = exported
+    return Response(data, mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+@app.route('/admin/profiles/flamegraph')
+def admin_flamegraph():
+    """Every sampled stack so far, collapsed, for flamegraph.pl or speedscope."""
+    if not is_admin_request(request):
+        return jsonify({'error': 'Forbidden'}), 403
+    return Response(profiler.flamegraph(), mimetype='text/plain',
+                    headers={'Content-Disposition': 'attachment; filename=flamegraph.collapsed'})
+
+@app.route('/admin/memory')
+def admin_memory():
+    """tracemalloc snapshot and the top allocation growth since the previous call."""
+    if not is_admin_request(request):
+        return jsonify({'error': 'Forbidden'}), 403
+    return jsonify(profiler.memory_report())
+
 if __name__ == '__main__':
     print("\n" + "=" * 60)
     print("🌐 Starting FOSS-CIT Enhanced Bot Server...")
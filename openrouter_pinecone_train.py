@@ -1,10 +1,16 @@
 # openrouter_pinecone_train.py - OpenRouter + Pinecone with Sentence Transformers
+#
+# Usage:
+#   python openrouter_pinecone_train.py                        # default namespace (FOSS-CIT)
+#   python openrouter_pinecone_train.py --namespace other-club # any namespace in namespaces.json
+import argparse
 import PyPDF2
 import json
 import re
 import os
 from pinecone import Pinecone, ServerlessSpec
-from sentence_transformers import SentenceTransformer
+from embedding_backend import load_embedding_backend
+from namespaces import DEFAULT_NAMESPACE, load_namespace_configs
 import time
 from dotenv import load_dotenv
 import requests
@@ -15,7 +21,6 @@ load_dotenv()
 
 # Configuration
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
-PINECONE_INDEX_NAME = "foss-cit-knowledge"
 EMBEDDING_DIMENSION = 384  # all-MiniLM-L6-v2 dimension
 
 print("🚀 FOSS-CIT Knowledge Base Creator with Sentence Transformers")
@@ -23,7 +28,7 @@ print("=" * 60)
 
 # Initialize local embedding model (no API required!)
 print("📦 Loading local embedding model...")
-embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+embedding_model = load_embedding_backend()
 print("✅ Local embedding model loaded successfully!")
 
 def extract_comprehensive_pdf_text(pdf_path):
@@ -54,7 +59,7 @@ def extract_comprehensive_pdf_text(pdf_path):
 def create_smart_chunks(text, source_name, chunk_size=500, overlap=50):
     """Create intelligent chunks from text."""
     # Split into sentences
-    sentences = re.split(r'[.!?]+', text)
+    sentences = re.split(r'(?<=[.!?])\s+', text)  # Keep terminators; don't split inside emails or decimals
     sentences = [s.strip() for s in sentences if s.strip()]
     
     chunks = []
@@ -102,7 +107,7 @@ def get_embedding(text):
         print(f"❌ Error getting embedding: {e}")
         return None
 
-def setup_pinecone():
+def setup_pinecone(index_name):
     """Initialize Pinecone index."""
     try:
         print("🔧 Setting up Pinecone...")
@@ -110,10 +115,10 @@ def setup_pinecone():
         pc = Pinecone(api_key=PINECONE_API_KEY)
         
         # Check if index exists
-        if PINECONE_INDEX_NAME not in pc.list_indexes().names():
-            print(f"🆕 Creating new index: {PINECONE_INDEX_NAME}")
+        if index_name not in pc.list_indexes().names():
+            print(f"🆕 Creating new index: {index_name}")
             pc.create_index(
-                name=PINECONE_INDEX_NAME,
+                name=index_name,
                 dimension=EMBEDDING_DIMENSION,
                 metric="cosine",
                 spec=ServerlessSpec(
@@ -124,10 +129,10 @@ def setup_pinecone():
             print("⏳ Waiting for index to be ready...")
             time.sleep(30)
         else:
-            print(f"✅ Using existing index: {PINECONE_INDEX_NAME}")
+            print(f"✅ Using existing index: {index_name}")
         
         # Connect to index
-        index = pc.Index(PINECONE_INDEX_NAME)
+        index = pc.Index(index_name)
         print(f"✅ Connected to Pinecone index with dimension {EMBEDDING_DIMENSION}")
         return index
         
@@ -135,12 +140,11 @@ def setup_pinecone():
         print(f"❌ Error setting up Pinecone: {e}")
         return None
 
-def fetch_website_data():
-    """Fetch comprehensive data from FOSS-CIT website."""
+def fetch_website_data(base_url):
+    """Fetch comprehensive data from a community website."""
     try:
-        print("🌐 Fetching FOSS-CIT website data...")
+        print(f"🌐 Fetching website data from {base_url}...")
         
-        base_url = "https://fosscit.netlify.app"
         response = requests.get(base_url, timeout=15)
         response.raise_for_status()
         
@@ -163,7 +167,7 @@ def fetch_website_data():
         print(f"❌ Error fetching website: {e}")
         return ""
 
-def add_chunks_to_pinecone(index, chunks):
+def add_chunks_to_pinecone(index, chunks, namespace=""):
     """Add all chunks to Pinecone with embeddings."""
     print(f"🚀 Adding {len(chunks)} chunks to Pinecone...")
     
@@ -196,7 +200,7 @@ def add_chunks_to_pinecone(index, chunks):
         # Upsert batch to Pinecone
         if vectors_to_upsert:
             try:
-                index.upsert(vectors=vectors_to_upsert)
+                index.upsert(vectors=vectors_to_upsert, namespace=namespace)
                 print(f"✅ Uploaded batch {i//batch_size + 1} ({len(vectors_to_upsert)} vectors)")
             except Exception as e:
                 print(f"❌ Error uploading batch: {e}")
@@ -207,10 +211,21 @@ def add_chunks_to_pinecone(index, chunks):
     return success_count
 
 def main():
-    """Main function to process PDFs and create knowledge base."""
+    """Main function to process PDFs and create a namespace's knowledge base."""
+    parser = argparse.ArgumentParser(description="Build a community knowledge base and upload it to Pinecone.")
+    parser.add_argument("-n", "--namespace", default=DEFAULT_NAMESPACE,
+                        help="Namespace from namespaces.json (default: DEFAULT_NAMESPACE)")
+    args = parser.parse_args()
+    
+    configs = load_namespace_configs()
+    if args.namespace not in configs:
+        print(f"❌ Unknown namespace: {args.namespace} (configured: {', '.join(configs)})")
+        return
+    config = configs[args.namespace]
+    print(f"🏘️ Building knowledge base for {config.display_name} ({config.name})")
     
     # Setup Pinecone
-    index = setup_pinecone()
+    index = setup_pinecone(config.pinecone_index)
     if not index:
         print("❌ Cannot proceed without Pinecone connection")
         return
@@ -218,12 +233,7 @@ def main():
     all_chunks = []
     
     # Process PDF files
-    pdf_files = [
-        ("data/About FOSS-CIT.pdf", "about_foss-cit"),
-        ("data/FOSS-CIT SOP.pdf", "foss-cit_sop")
-    ]
-    
-    for pdf_path, source_name in pdf_files:
+    for pdf_path, source_name in config.pdf_files:
         if os.path.exists(pdf_path):
             text = extract_comprehensive_pdf_text(pdf_path)
             if text:
@@ -234,51 +244,37 @@ def main():
             print(f"⚠️ File not found: {pdf_path}")
     
     # Add website data
-    website_text = fetch_website_data()
+    website_text = fetch_website_data(config.website_url) if config.website_url else ""
     if website_text:
         website_chunks = create_smart_chunks(website_text, "website_data")
         all_chunks.extend(website_chunks)
         print(f"🌐 Created {len(website_chunks)} chunks from website")
     
     # Add manual knowledge
-    manual_knowledge = [
-        {
-            "id": "foss_founders_1",
-            "text": "FOSS-CIT was founded by Dhileepan Thangamanimaran, Sai Adarsh, and Sibi Bose. These three individuals initiated the Free and Open Source Software Community at Chennai Institute of Technology.",
-            "source": "manual_entry",
-            "chunk_number": 1,
-            "chunk_size": 150
-        },
-        {
-            "id": "foss_mission_1", 
-            "text": "FOSS-CIT aims to promote open source software development, provide programming education, and build a community of developers interested in contributing to open source projects.",
-            "source": "manual_entry",
-            "chunk_number": 2,
-            "chunk_size": 140
-        }
-    ]
+    manual_knowledge = config.manual_knowledge
     
     all_chunks.extend(manual_knowledge)
     print(f"📋 Added {len(manual_knowledge)} manual knowledge entries")
     
     # Save local knowledge base
     print("💾 Saving local knowledge base...")
-    with open('complete_knowledge_base.json', 'w', encoding='utf-8') as f:
+    os.makedirs(os.path.dirname(config.knowledge_base) or ".", exist_ok=True)
+    with open(config.knowledge_base, 'w', encoding='utf-8') as f:
         json.dump(all_chunks, f, indent=2, ensure_ascii=False)
     
     print(f"📊 Total chunks created: {len(all_chunks)}")
     
     # Add to Pinecone
-    success_count = add_chunks_to_pinecone(index, all_chunks)
+    success_count = add_chunks_to_pinecone(index, all_chunks, config.pinecone_namespace)
     
     # Final summary
     print("\n" + "=" * 60)
     print("🎉 KNOWLEDGE BASE CREATION COMPLETE!")
     print("=" * 60)
-    print(f"📁 Local file: complete_knowledge_base.json ({len(all_chunks)} chunks)")
+    print(f"📁 Local file: {config.knowledge_base} ({len(all_chunks)} chunks)")
     print(f"☁️ Pinecone vectors: {success_count} uploaded successfully")
-    print(f"🔍 Embedding model: Sentence Transformers (local, no API costs!)")
-    print(f"📡 Vector database: Pinecone ({PINECONE_INDEX_NAME})")
+    print(f"🔍 Embedding model: {embedding_model.name} (local, no API costs!)")
+    print(f"📡 Vector database: Pinecone ({config.pinecone_index}, namespace '{config.pinecone_namespace}')")
     print("✅ Ready for semantic search!")
 
 if __name__ == "__main__":
@@ -0,0 +1,287 @@
+# profiling.py - Opt-in per-request profiling (stack sampling or cProfile) and memory snapshots
+import cProfile
+import io
+import itertools
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from flask import g, request
+from dotenv import load_dotenv
+from admin import is_admin_request
+
+load_dotenv()
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0.05"))  # Share of requests profiled when enabled
+PROFILE_MODE = os.getenv("PROFILE_MODE", "sample")  # "sample" (stack sampling) or "cprofile"
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))  # Stack sampling period
+PROFILE_MIN_MS = float(os.getenv("PROFILE_MIN_MS", "0"))  # Keep only profiles of requests at least this slow
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))  # Profiles kept in memory for download
+PROFILE_TRACEMALLOC = os.getenv("PROFILE_TRACEMALLOC", "false").lower() in ("1", "true", "yes")
+PROFILE_TRACEMALLOC_FRAMES = int(os.getenv("PROFILE_TRACEMALLOC_FRAMES", "1"))  # 1 frame keeps overhead low
+
+PROFILE_HEADER = "X-Profile"  # "1"/"sample" or "cprofile"; honoured for admin requests only
+PROFILE_HEADER_ENVIRON = "HTTP_X_PROFILE"
+PROFILE_MODES = ("sample", "cprofile")
+
+
+def frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse_stack(frame):
+    """Stack as one collapsed-format line, root first: 'a (f.py:1);b (f.py:9)'."""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def format_collapsed(stacks):
+    """Counter of collapsed stacks -> text for flamegraph.pl, speedscope or inferno."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class StackSampler:
+    """Samples one thread's Python stack every `interval` seconds from a helper thread.
+
+    The profiled thread runs at full speed; cost is one frame walk per sample.
+    """
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse_stack(frame)] += 1
+
+
+class RequestProfiler:
+    """Profiles selected requests to `endpoints` and keeps the results for download.
+
+    A request is profiled when PROFILING_ENABLED picks it (PROFILE_SAMPLE_RATE) or
+    when an admin sends the X-Profile header. Otherwise the only cost is the
+    check in `before_request`. cProfile captures one request at a time; concurrent
+    picks fall back to stack sampling.
+    """
+
+    def __init__(self, endpoints, enabled=PROFILING_ENABLED, sample_rate=PROFILE_SAMPLE_RATE,
+                 mode=PROFILE_MODE, interval_ms=PROFILE_INTERVAL_MS, min_ms=PROFILE_MIN_MS,
+                 keep=PROFILE_KEEP, trace_memory=PROFILE_TRACEMALLOC):
+        self.endpoints = set(endpoints)
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.mode = mode if mode in PROFILE_MODES else "sample"
+        self.interval = interval_ms / 1000
+        self.min_ms = min_ms
+        self._profiles = deque(maxlen=keep)
+        self._flamegraph = Counter()  # All sampled stacks, for one combined flamegraph
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._cprofile_lock = threading.Lock()
+        self._last_snapshot = None
+        self.profiled = 0
+        self.discarded = 0
+
+        if self.enabled and trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+        if self.enabled:
+            print(f"🔬 Profiling {self.sample_rate:.0%} of requests to {', '.join(sorted(self.endpoints))} ({self.mode})")
+
+    def _requested_mode(self):
+        header = request.headers.get(PROFILE_HEADER)
+        if header is not None:
+            if not is_admin_request(request):
+                return None
+            return header if header in PROFILE_MODES else self.mode
+        if self.enabled and random.random() < self.sample_rate:
+            return self.mode
+        return None
+
+    def before_request(self):
+        # Fast path when off: one WSGI environ lookup per request
+        if not self.enabled and PROFILE_HEADER_ENVIRON not in request.environ:
+            return
+        if request.endpoint not in self.endpoints:
+            return
+        mode = self._requested_mode()
+        if mode is None:
+            return
+
+        if mode == "cprofile" and self._cprofile_lock.acquire(blocking=False):
+            capture = cProfile.Profile()
+            capture.enable()
+        else:
+            mode = "sample"
+            capture = StackSampler(threading.get_ident(), self.interval)
+            capture.start()
+        memory = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        g.profile = (mode, capture, time.perf_counter(), memory)
+
+    def _stop(self):
+        """Stop the current request's capture; returns (mode, data, started, memory) or None."""
+        if "profile" not in g:
+            return None
+        active = g.pop("profile", None)
+        if active is None:
+            return None
+        mode, capture, started, memory = active
+        if mode == "cprofile":
+            capture.disable()
+            self._cprofile_lock.release()
+            capture.create_stats()
+            return mode, capture.stats, started, memory
+        return mode, capture.stop(), started, memory
+
+    def after_request(self, response):
+        stopped = self._stop()
+        if stopped is None:
+            return response
+        mode, data, started, memory = stopped
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        with self._lock:
+            self.profiled += 1
+            if duration_ms < self.min_ms:
+                self.discarded += 1
+                return response
+            profile_id = next(self._ids)
+            self._profiles.append({
+                "id": profile_id,
+                "ts": round(time.time(), 3),
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                "duration_ms": round(duration_ms, 2),
+                "mode": mode,
+                "samples": sum(data.values()) if mode == "sample" else None,
+                "memory_delta_bytes": (tracemalloc.get_traced_memory()[0] - memory
+                                       if memory is not None and tracemalloc.is_tracing() else None),
+                "data": data
+            })
+            if mode == "sample":
+                self._flamegraph.update(data)
+        response.headers["X-Profile-Id"] = str(profile_id)
+        return response
+
+    def teardown_request(self, exc=None):
+        # Only reached with a live capture when the request failed before after_request
+        self._stop()
+
+    def install(self, app):
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+        app.teardown_request(self.teardown_request)
+
+    def profiles(self):
+        """Kept profiles without their data, newest first."""
+        with self._lock:
+            return [{k: v for k, v in p.items() if k != "data"} for p in reversed(self._profiles)]
+
+    def export(self, profile_id):
+        """(filename, mimetype, bytes) for one profile, or None if it is gone.
+
+        Sampled profiles are collapsed stacks; cProfile ones are pstats files
+        (open with `python -m pstats`, snakeviz or flameprof).
+        """
+        with self._lock:
+            profile = next((p for p in self._profiles if p["id"] == profile_id), None)
+        if profile is None:
+            return None
+        if profile["mode"] == "sample":
+            return f"profile-{profile_id}.collapsed", "text/plain", format_collapsed(profile["data"]).encode()
+        return f"profile-{profile_id}.prof", "application/octet-stream", marshal.dumps(profile["data"])
+
+    def summary(self, profile_id, limit=30):
+        """Top functions by cumulative time for a cProfile profile, as text."""
+        with self._lock:
+            profile = next((p for p in self._profiles if p["id"] == profile_id), None)
+        if profile is None or profile["mode"] != "cprofile":
+            return None
+        stats = pstats.Stats(_StatsSource(profile["data"]), stream=io.StringIO())
+        stats.sort_stats("cumulative").print_stats(limit)
+        return stats.stream.getvalue()
+
+    def flamegraph(self):
+        """All sampled stacks since startup (or the last reset) in collapsed format."""
+        with self._lock:
+            return format_collapsed(self._flamegraph)
+
+    def reset(self):
+        with self._lock:
+            self._profiles.clear()
+            self._flamegraph.clear()
+
+    def memory_report(self, limit=20):
+        """Compare a new tracemalloc snapshot with the previous one; top growth by line.
+
+        Starts tracing on first use if it is not running yet.
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+            self._last_snapshot = None
+            return {"status": "started", "message": "tracemalloc started; call again to see growth"}
+
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+        report = {"status": "ok", "traced_bytes": current, "peak_bytes": peak}
+        if self._last_snapshot is not None:
+            report["top_growth"] = [
+                {"location": str(stat.traceback), "size_diff_bytes": stat.size_diff,
+                 "size_bytes": stat.size, "count_diff": stat.count_diff}
+                for stat in snapshot.compare_to(self._last_snapshot, "lineno")[:limit]
+            ]
+        else:
+            report["top_allocations"] = [
+                {"location": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+                for stat in snapshot.statistics("lineno")[:limit]
+            ]
+        self._last_snapshot = snapshot
+        return report
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "sample_rate": self.sample_rate,
+                "mode": self.mode,
+                "profiled": self.profiled,
+                "discarded_fast": self.discarded,
+                "kept": len(self._profiles),
+                "tracemalloc": tracemalloc.is_tracing()
+            }
+
+
+class _StatsSource:
+    """Lets pstats.Stats load raw cProfile stats kept in memory."""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
@@ -0,0 +1,156 @@
+# query_log.py - Non-blocking JSONL query log written by a background thread
+import atexit
+import glob
+import json
+import os
+import queue
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+QUERY_LOG_ENABLED = os.getenv("QUERY_LOG_ENABLED", "true").lower() in ("1", "true", "yes")
+QUERY_LOG_PATH = os.getenv("QUERY_LOG_PATH", "logs/queries.jsonl")
+QUERY_LOG_MAX_BYTES = int(os.getenv("QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))  # Rotate past this size
+QUERY_LOG_BACKUPS = int(os.getenv("QUERY_LOG_BACKUPS", "5"))  # Rotated files kept (queries.jsonl.1 ...)
+QUERY_LOG_QUEUE_SIZE = int(os.getenv("QUERY_LOG_QUEUE_SIZE", "10000"))  # Records buffered before dropping
+
+_STOP = object()
+
+
+def rotated_files(path):
+    """Existing log files for `path`, oldest first (path.N ... path.1, path)."""
+    def backup_number(name):
+        suffix = name.rsplit(".", 1)[-1]
+        return int(suffix) if suffix.isdigit() else 0
+
+    backups = [name for name in glob.glob(glob.escape(path) + ".*") if backup_number(name)]
+    backups.sort(key=backup_number, reverse=True)
+    return backups + ([path] if os.path.exists(path) else [])
+
+
+class QueryLog:
+    """Appends one JSON record per answered question to a size-rotated JSONL file.
+
+    `log()` only puts the record on a bounded in-memory queue and never waits: if
+    the writer falls behind and the queue is full, the record is dropped and
+    counted. Serialization, writes and rotation all happen in the writer thread,
+    which starts with the first record, so a process that imports the bot but
+    sets `enabled = False` before answering never touches the file.
+    """
+
+    def __init__(self, path=QUERY_LOG_PATH, enabled=QUERY_LOG_ENABLED, max_bytes=QUERY_LOG_MAX_BYTES,
+                 backups=QUERY_LOG_BACKUPS, queue_size=QUERY_LOG_QUEUE_SIZE):
+        self.path = path
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._file = None
+        self._thread = None
+        self.logged = 0
+        self.dropped = 0
+        self.written = 0
+        self.rotations = 0
+        self.write_errors = 0
+
+        if self.enabled:
+            print(f"📝 Logging queries to {self.path}")
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="query-log", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def log(self, record):
+        """Queue a record (a dict of JSON-serializable values) for writing; never blocks."""
+        if not self.enabled:
+            return
+        if self._thread is None:
+            self._start()
+        record.setdefault("ts", round(time.time(), 3))
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return
+        with self._lock:
+            self.logged += 1
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _rotate(self):
+        """queries.jsonl -> queries.jsonl.1 -> ... -> queries.jsonl.<backups> (oldest dropped)."""
+        self._file.close()
+        if self.backups > 0:
+            for i in range(self.backups - 1, 0, -1):
+                source = f"{self.path}.{i}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+        self.rotations += 1
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            # Drain whatever else is waiting so a burst becomes one write + flush
+            while len(batch) < 512:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(record is _STOP for record in batch)
+            records = [record for record in batch if record is not _STOP]
+
+            try:
+                if self._file is None:
+                    self._open()
+                for record in records:
+                    self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                self._file.flush()
+                self.written += len(records)
+                if self.max_bytes and self._file.tell() >= self.max_bytes:
+                    self._rotate()
+            except Exception as e:
+                self.write_errors += 1
+                print(f"⚠️ Query log write failed: {e}")
+                self._file = None
+
+            if stop:
+                break
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self, timeout=2.0):
+        """Flush queued records and stop the writer (called automatically at exit)."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "path": self.path,
+                "logged": self.logged,
+                "dropped": self.dropped,
+                "written": self.written,
+                "pending": self._queue.qsize(),
+                "rotations": self.rotations,
+                "write_errors": self.write_errors
+            }
@@ -0,0 +1,118 @@
+# reranker.py - Optional cross-encoder re-ranking stage with a latency budget
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Configuration
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() in ("1", "true", "yes")
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_TOP_N = int(os.getenv("RERANK_TOP_N", "10"))  # First-stage candidates to score
+RERANK_KEEP = int(os.getenv("RERANK_KEEP", "2"))  # Chunks kept for the prompt
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "150"))  # Hard latency budget
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "16"))
+RERANK_WORKERS = int(os.getenv("RERANK_WORKERS", "2"))
+# First-stage cosine floor while re-ranking (lower than the usual 0.6 so the
+# cross-encoder sees more candidates to choose from)
+RERANK_CANDIDATE_MIN_SCORE = float(os.getenv("RERANK_CANDIDATE_MIN_SCORE", "0.3"))
+
+_model = None
+_model_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=RERANK_WORKERS, thread_name_prefix="rerank")
+
+_stats_lock = threading.Lock()
+_stats = {"reranked": 0, "timeouts": 0, "errors": 0, "total_ms": 0.0}
+
+
+def _count(key, elapsed_ms=None):
+    with _stats_lock:
+        _stats[key] += 1
+        if elapsed_ms is not None:
+            _stats["total_ms"] += elapsed_ms
+
+
+def get_model():
+    """Load the cross-encoder once (thread-safe)."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from sentence_transformers import CrossEncoder
+                print(f"📦 Loading re-ranking model {RERANK_MODEL}...")
+                _model = CrossEncoder(RERANK_MODEL)
+                print("✅ Re-ranking model loaded!")
+    return _model
+
+
+def warm_up():
+    """Load the model and run one tiny batch so the first request pays no startup cost."""
+    if not RERANK_ENABLED:
+        return
+    try:
+        get_model().predict([("warm up", "warm up")], batch_size=1)
+    except Exception as e:
+        print(f"⚠️ Re-ranker warm-up failed, first-stage order will be used: {e}")
+
+
+def rerank(query, candidates, top_k=RERANK_KEEP, text_key='text', fallback=None):
+    """Re-order candidates by cross-encoder relevance to the query.
+
+    Only the first RERANK_TOP_N candidates are scored, in batches. If the model is
+    unavailable or scoring does not finish within RERANK_BUDGET_MS, the candidates
+    are returned in their original first-stage order, or `fallback()` is returned
+    when given (e.g. a stricter selection than the wide candidate pool). Candidates
+    may be dicts (read via `text_key`) or plain strings.
+    """
+    candidates = list(candidates)[:RERANK_TOP_N]
+    if fallback is None:
+        fallback = lambda: candidates[:top_k]
+    if not RERANK_ENABLED or len(candidates) < 2:
+        return candidates[:top_k]
+
+    texts = [c[text_key] if isinstance(c, dict) else c for c in candidates]
+    pairs = [(query, text) for text in texts]
+
+    start = time.perf_counter()
+    future = _executor.submit(lambda: get_model().predict(pairs, batch_size=RERANK_BATCH_SIZE))
+    try:
+        scores = future.result(timeout=RERANK_BUDGET_MS / 1000)
+    except FutureTimeout:
+        # Not started yet means the workers are saturated; drop it from the queue
+        future.cancel()
+        _count("timeouts")
+        print(f"⏱️ Re-ranking exceeded {RERANK_BUDGET_MS:.0f}ms, using first-stage order")
+        return fallback()
+    except Exception as e:
+        _count("errors")
+        print(f"❌ Re-ranking error: {e}")
+        return fallback()
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    _count("reranked", elapsed_ms)
+
+    order = sorted(range(len(candidates)), key=lambda i: float(scores[i]), reverse=True)
+    reranked = []
+    for i in order[:top_k]:
+        candidate = candidates[i]
+        if isinstance(candidate, dict):
+            candidate = dict(candidate, rerank_score=float(scores[i]))
+        reranked.append(candidate)
+    return reranked
+
+
+def stats():
+    """Re-ranking counters for the health endpoint."""
+    with _stats_lock:
+        reranked = _stats["reranked"]
+        return {
+            "enabled": RERANK_ENABLED,
+            "model": RERANK_MODEL if RERANK_ENABLED else None,
+            "budget_ms": RERANK_BUDGET_MS,
+            "reranked": reranked,
+            "timeouts": _stats["timeouts"],
+            "errors": _stats["errors"],
+            "avg_ms": round(_stats["total_ms"] / reranked, 2) if reranked else 0.0
+        }
@@ -0,0 +1,64 @@
+# Batch work must not starve interactive LLM calls.
+import threading
+
+from admission import AdmissionController
+
+
+def test_batch_callers_stay_within_their_share():
+    controller = AdmissionController(max_concurrency=4, max_queue=1, queue_timeout=0.5,
+                                     max_batch_concurrency=2)
+    hold = threading.Event()
+    started = threading.Semaphore(0)
+
+    def batch_call():
+        with controller.slot(block=True):
+            started.release()
+            hold.wait()
+
+    workers = [threading.Thread(target=batch_call) for _ in range(6)]
+    for worker in workers:
+        worker.start()
+    for _ in range(2):
+        started.acquire()
+
+    try:
+        stats = controller.stats()
+        assert stats["batch_in_flight"] == 2
+        assert stats["batch_waiting"] == 4
+        assert stats["waiting"] == 0  # Queued batch callers do not fill the shed queue
+
+        with controller.slot() as first, controller.slot() as second:
+            assert first and second
+        assert controller.stats()["shed_queue_full"] == 0
+    finally:
+        hold.set()
+        for worker in workers:
+            worker.join()
+
+    stats = controller.stats()
+    assert stats["in_flight"] == 0 and stats["batch_in_flight"] == 0
+    assert stats["admitted"] == 8
+
+
+def test_batch_share_leaves_one_slot_for_interactive_calls():
+    assert AdmissionController(max_concurrency=4, max_batch_concurrency=8).max_batch_concurrency == 3
+    assert AdmissionController(max_concurrency=1, max_batch_concurrency=2).max_batch_concurrency == 1
+
+
+def test_offline_controller_scales_with_concurrency():
+    controller = AdmissionController(max_concurrency=16, max_batch_concurrency=16, interactive_reserve=0)
+    assert controller.max_batch_concurrency == 16
+
+    barrier = threading.Barrier(16, timeout=5)  # Breaks unless all 16 hold a slot at once
+
+    def batch_call():
+        with controller.slot(block=True):
+            barrier.wait()
+
+    workers = [threading.Thread(target=batch_call) for _ in range(16)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert not barrier.broken
+    assert controller.stats()["admitted"] == 16
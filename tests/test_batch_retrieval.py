@@ -0,0 +1,65 @@
+# /chat and /chat/batch must build the prompt from the same local context.
+# Imports the Pinecone bot, so it is skipped when the embedding model is unavailable.
+import json
+import os
+
+import pytest
+
+KNOWLEDGE_BASE = [
+    {"id": "a", "text": "FOSS-CIT was founded by three students to promote open source software.", "source": "about"},
+    {"id": "b", "text": "Hackathons and coding contests are held every semester for club members.", "source": "events"},
+    {"id": "c", "text": "Members must notify the secretary in advance before taking leave during an event.", "source": "sop"},
+    {"id": "d", "text": "The joint secretary oversees the internal functioning of the club.", "source": "sop"},
+]
+
+QUESTIONS = ["Who started FOSS-CIT?", "When are hackathons held?", "Can I take leave during an event?"]
+
+
+@pytest.fixture(scope="module")
+def bot(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("kb")
+    kb_path = directory / "kb.json"
+    kb_path.write_text(json.dumps(KNOWLEDGE_BASE), encoding="utf-8")
+    config_path = directory / "namespaces.json"
+    config_path.write_text(json.dumps({"foss-cit": {"knowledge_base": str(kb_path)}}), encoding="utf-8")
+
+    overrides = {
+        "OPENAI_API_KEY": "test", "PINECONE_API_KEY": "test", "NAMESPACES_CONFIG": str(config_path),
+        "QUERY_LOG_ENABLED": "false", "HOT_ANSWERS_PATH": str(directory / "none.json"),
+        "ANSWER_CACHE_SIZE": "0", "KB_WATCH_INTERVAL": "0", "KNOWLEDGE_BASE_PATH": "",
+    }
+    saved = {key: os.environ.get(key) for key in overrides}
+    os.environ.update(overrides)
+    try:
+        import openrouter_pinecone_bot
+    except Exception as e:
+        pytest.skip(f"Pinecone bot unavailable: {e}")
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+    tenant = openrouter_pinecone_bot.namespaces.get()
+    if tenant.kb_store.current().indexes.get('vectors') is None:
+        pytest.skip("Local vector index was not built")
+    tenant.pinecone_index = None  # Local retrieval only
+    return openrouter_pinecone_bot
+
+
+def test_batch_and_chat_retrieve_the_same_chunks(bot, monkeypatch):
+    prompts = {}
+
+    def record(user_message, context_chunks, system_prompt):
+        prompts.setdefault(user_message, []).append([chunk['text'] for chunk in context_chunks])
+        return "ok"
+
+    monkeypatch.setattr(bot, "get_ai_response", record)
+    for question in QUESTIONS:
+        bot.answer_question(question)
+    list(bot.answer_batch([{'id': i, 'message': q} for i, q in enumerate(QUESTIONS)], concurrency=2))
+
+    for question in QUESTIONS:
+        chat_context, batch_context = prompts[question]
+        assert chat_context, question
+        assert chat_context == batch_context, question
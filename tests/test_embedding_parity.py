@@ -0,0 +1,71 @@
+# ONNX embedding backend vs sentence-transformers on the real MiniLM model.
+# Skipped when the model (or the ONNX toolchain) is not available, e.g. offline.
+import json
+
+import numpy as np
+import pytest
+
+import embedding_backend
+from embedding_backend import (EMBEDDING_MODEL_NAME, PARITY_MIN_COSINE, OnnxBackend,
+                               SentenceTransformerBackend)
+
+TEXTS = [
+    "Who founded FOSS-CIT?",
+    "How can I contribute to open source?",
+    "hi",
+    "FOSS-CIT conducts bootcamps, workshops, coding contests and hackathons for students.",
+    "Mock interviews are conducted to help members prepare for placements.",
+    "The joint secretary coordinates events and manages communication with participants.",
+]
+
+
+@pytest.fixture(scope="module")
+def reference():
+    pytest.importorskip("sentence_transformers")
+    try:
+        return SentenceTransformerBackend(EMBEDDING_MODEL_NAME)
+    except Exception as e:
+        pytest.skip(f"{EMBEDDING_MODEL_NAME} unavailable: {e}")
+
+
+@pytest.mark.parametrize("quantize", [False, True])
+def test_onnx_matches_sentence_transformers(reference, tmp_path_factory, quantize):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("onnx")
+    candidate = OnnxBackend(EMBEDDING_MODEL_NAME, str(tmp_path_factory.mktemp("onnx")), quantize=quantize)
+
+    expected = reference.encode(TEXTS)
+    actual = candidate.encode(TEXTS)
+    assert actual.shape == expected.shape
+
+    cosines = (expected * actual).sum(axis=1)
+    assert cosines.min() >= (0.999 if not quantize else PARITY_MIN_COSINE)
+
+    # Every text still retrieves the same nearest neighbour
+    assert np.array_equal(np.argmax(actual @ expected.T, axis=1), np.arange(len(TEXTS)))
+
+
+def test_single_text_returns_vector(reference, tmp_path):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("onnx")
+    candidate = OnnxBackend(EMBEDDING_MODEL_NAME, str(tmp_path), quantize=False)
+    assert candidate.encode("hi").shape == reference.encode("hi").shape
+
+
+def test_stale_export_for_another_model_is_replaced(tmp_path, monkeypatch):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("transformers")
+    (tmp_path / "model_int8.onnx").write_bytes(b"")
+    (tmp_path / "embedding_config.json").write_text(
+        json.dumps({"model_name": "some-other-model", "max_seq_length": 128}))
+
+    exports = []
+
+    def fake_export(model_name, model_dir, quantize):
+        exports.append(model_name)
+        raise RuntimeError("export called")
+
+    monkeypatch.setattr(embedding_backend, "export_onnx", fake_export)
+    with pytest.raises(RuntimeError, match="export called"):
+        OnnxBackend(EMBEDDING_MODEL_NAME, str(tmp_path), quantize=True)
+    assert exports == [EMBEDDING_MODEL_NAME]
@@ -0,0 +1,99 @@
+# vector_index.py - Compact local embedding storage (float32 / float16 / int8)
+import numpy as np
+
+SUPPORTED_DTYPES = ("float32", "float16", "int8")
+
+
+class VectorIndex:
+    """In-memory dot-product index over normalized embeddings.
+
+    - float32: exact, 4 bytes per dimension
+    - float16: 2 bytes per dimension, near-exact scores
+    - int8:    1 byte per dimension plus one float32 scale per vector
+               (symmetric quantization: vector ~= codes * scale)
+
+    Queries stay float32. float16/int8 storage saves memory, not arithmetic: each
+    block of stored vectors is widened to float32 before a float32 BLAS matmul (there
+    is no integer GEMM), so temporary memory stays bounded at one block.
+
+    For int8, `keep_rescore_copy` also keeps a float16 copy (2 bytes per dimension,
+    ~0.76x float32 in total). With `rescore` > 0 in `search`, the best `rescore`
+    int8 candidates are re-scored against it before the final top-k cut. float16
+    and float32 are already precise enough that rescoring adds nothing, so they keep
+    no copy.
+    """
+
+    def __init__(self, vectors, dtype="float32", keep_rescore_copy=False, block_size=8192):
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported dtype {dtype!r}; use one of {SUPPORTED_DTYPES}")
+
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2:
+            raise ValueError("vectors must be a 2-D array")
+
+        self.dtype = dtype
+        self.block_size = block_size
+        self.scales = None
+
+        if dtype == "int8":
+            max_abs = np.abs(vectors).max(axis=1)
+            self.scales = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+            self.data = np.clip(np.rint(vectors / self.scales[:, None]), -127, 127).astype(np.int8)
+        elif dtype == "float16":
+            self.data = vectors.astype(np.float16)
+        else:
+            self.data = vectors
+
+        self.rescore_data = vectors.astype(np.float16) if keep_rescore_copy and dtype == "int8" else None
+
+    def __len__(self):
+        return self.data.shape[0]
+
+    @property
+    def dim(self):
+        return self.data.shape[1]
+
+    def memory_bytes(self):
+        """Bytes held by the index, including scales and any rescoring copy."""
+        total = self.data.nbytes
+        if self.scales is not None:
+            total += self.scales.nbytes
+        if self.rescore_data is not None:
+            total += self.rescore_data.nbytes
+        return total
+
+    def scores(self, queries):
+        """Approximate scores for every (query, vector) pair, shape (n_queries, n_vectors)."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if self.dtype == "float32":
+            return queries @ self.data.T
+
+        out = np.empty((queries.shape[0], len(self)), dtype=np.float32)
+        for start in range(0, len(self), self.block_size):
+            end = start + self.block_size
+            block = self.data[start:end].astype(np.float32)
+            out[:, start:end] = queries @ block.T
+            if self.scales is not None:
+                out[:, start:end] *= self.scales[start:end]
+        return out
+
+    def search(self, queries, top_k=10, rescore=0):
+        """Return (scores, indices), each shape (n_queries, k), best first."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if not len(self):
+            empty = np.empty((queries.shape[0], 0))
+            return empty.astype(np.float32), empty.astype(np.int64)
+
+        scores = self.scores(queries)
+        rescoring = rescore > 0 and self.rescore_data is not None
+        k = min(max(top_k, rescore) if rescoring else top_k, len(self))
+
+        idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, idx, axis=1)
+
+        if rescoring:
+            # float16-precision dot products for the shortlisted candidates only
+            top_scores = np.einsum('qd,qkd->qk', queries, self.rescore_data[idx].astype(np.float32))
+
+        order = np.argsort(-top_scores, axis=1)[:, :min(top_k, k)]
+        return np.take_along_axis(top_scores, order, axis=1), np.take_along_axis(idx, order, axis=1)